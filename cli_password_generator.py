@@ -2,136 +2,85 @@
 """
 Command Line Password Generator
 A simple and secure password generator for terminal use.
+
+Scripts often call this once per password, so startup is kept short: a
+plain `-l 20` style invocation is handled before argparse is imported, and
+the vault, breach filter, policy, passphrase and pattern modules (and the standard
+library modules behind them) are only imported by the commands that use them.
 """
 
-import argparse
-import random
-import string
-import json
 import os
-from datetime import datetime
+import sys
+
+import password_engine
+import password_strength
+from password_core import MASTER_PASSWORD_ENV, PasswordCore, read_master_password
+
+# Values of --format; table is the emoji display (and the default for --list)
+OUTPUT_FORMATS = ('table', 'plain', 'json', 'jsonl', 'csv')
+
+# password_breach.DEFAULT_FILTER_FILE, repeated so the fast path need not import it
+BREACH_FILTER_FILE = 'breached_passwords.bloom'
 
-class CLIPasswordGenerator:
-    def __init__(self):
-        self.saved_passwords_file = 'cli_saved_passwords.json'
-        self.load_saved_passwords()
+# Flags the fast path understands, with the charset option each one sets
+FAST_FLAGS = {
+    '--no-uppercase': ('uppercase', False),
+    '--no-lowercase': ('lowercase', False),
+    '--no-numbers': ('numbers', False),
+    '--no-symbols': ('symbols', False),
+    '--exclude-similar': ('exclude_similar', True),
+    '--exclude-ambiguous': ('exclude_ambiguous', True),
+}
+
+class CLIPasswordGenerator(PasswordCore):
+    """The command-line front end: PasswordCore plus terminal output and interactive mode."""
+    
+    def save_password(self, password, description="", out=None):
+        """Save password with description, unless it is already in the vault.
         
-    def load_saved_passwords(self):
-        """Load saved passwords from JSON file."""
-        self.saved_passwords = []
-        try:
-            if os.path.exists(self.saved_passwords_file):
-                with open(self.saved_passwords_file, 'r') as f:
-                    self.saved_passwords = json.load(f)
-        except Exception as e:
-            print(f"Warning: Could not load saved passwords: {e}")
-            
-    def save_passwords_to_file(self):
-        """Save passwords to JSON file."""
+        Status messages go to `out` (default: stdout).
+        """
         try:
-            with open(self.saved_passwords_file, 'w') as f:
-                json.dump(self.saved_passwords, f, indent=2)
+            record = self.add_password(password, description)
         except Exception as e:
-            print(f"Error saving passwords: {e}")
-            
-    def generate_password(self, length=16, uppercase=True, lowercase=True, 
-                         numbers=True, symbols=True, exclude_similar=False, 
-                         exclude_ambiguous=False):
-        """Generate a password with specified criteria."""
-        
-        # Build character set
-        chars = ""
-        
-        if uppercase:
-            chars += string.ascii_uppercase
-        if lowercase:
-            chars += string.ascii_lowercase
-        if numbers:
-            chars += string.digits
-        if symbols:
-            chars += "!@#$%^&*()_+-=[]{}|;:,.<>?"
-            
-        if not chars:
-            raise ValueError("At least one character type must be selected!")
-            
-        # Remove similar characters if requested
-        if exclude_similar:
-            similar_chars = "l1IO0"
-            chars = ''.join(c for c in chars if c not in similar_chars)
-            
-        # Remove ambiguous characters if requested
-        if exclude_ambiguous:
-            ambiguous_chars = "{}[]()/\\|`~"
-            chars = ''.join(c for c in chars if c not in ambiguous_chars)
-            
-        # Generate password
-        password = ''.join(random.choice(chars) for _ in range(length))
-        return password
+            print(f"Error saving passwords: {e}", file=out)
+            return
+        if record is None:
+            print("⚠️ This password is already saved!", file=out)
+            return
+        print(f"✅ Password saved successfully!", file=out)
         
-    def check_password_strength(self, password):
-        """Check password strength and return score and feedback."""
-        score = 0
-        feedback = []
+    def list_saved_passwords(self, search=None, since=None, until=None, min_length=None,
+                             limit=None, offset=0, fmt='table', out=None):
+        """Display saved passwords matching the filters, in any of OUTPUT_FORMATS (plain lists passwords only)."""
+        import itertools
         
-        if len(password) >= 8:
-            score += 1
-        if len(password) >= 12:
-            score += 1
-        if any(c.isupper() for c in password):
-            score += 1
-        if any(c.islower() for c in password):
-            score += 1
-        if any(c.isdigit() for c in password):
-            score += 1
-        if any(c in "!@#$%^&*()_+-=[]{}|;:,.<>?" for c in password):
-            score += 1
+        out = out or sys.stdout
+        vault = self.vault
+        records = iter(())
+        if vault is not None:
+            records = vault.query(search, since, until, min_length, limit, offset)
             
-        if score <= 2:
-            strength = "Weak"
-        elif score <= 4:
-            strength = "Fair"
-        elif score <= 5:
-            strength = "Good"
-        else:
-            strength = "Strong"
-            
-        return strength, score
-        
-    def save_password(self, password, description=""):
-        """Save password with description."""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        password_data = {
-            "password": password,
-            "description": description or "No description",
-            "timestamp": timestamp,
-            "length": len(password)
-        }
-        
-        self.saved_passwords.append(password_data)
-        self.save_passwords_to_file()
-        print(f"✅ Password saved successfully!")
-        
-    def list_saved_passwords(self):
-        """Display all saved passwords."""
-        if not self.saved_passwords:
-            print("📝 No saved passwords found.")
+        if fmt != 'table':
+            # The other formats are written exactly as `export` writes them
+            import password_transfer
+            password_transfer.export_records(records, out, fmt)
             return
             
-        print("\n📋 Saved Passwords:")
-        print("=" * 60)
+        first = next(records, None)
+        if first is None:
+            print("📝 No saved passwords found.", file=out)
+            return
+        out.write("\n📋 Saved Passwords:\n" + "=" * 60 + "\n")
+        for i, pwd_data in enumerate(itertools.chain([first], records), offset + 1):
+            out.write(f"{i}. {pwd_data['description']}\n"
+                      f"   Password: {pwd_data['password']}\n"
+                      f"   Length: {pwd_data['length']} | Created: {pwd_data['timestamp']}\n"
+                      + "-" * 60 + "\n")
         
-        for i, pwd_data in enumerate(self.saved_passwords, 1):
-            print(f"{i}. {pwd_data['description']}")
-            print(f"   Password: {pwd_data['password']}")
-            print(f"   Length: {pwd_data['length']} | Created: {pwd_data['timestamp']}")
-            print("-" * 60)
-            
     def clear_saved_passwords(self):
         """Clear all saved passwords."""
-        if self.saved_passwords:
-            self.saved_passwords = []
-            self.save_passwords_to_file()
+        if self.clear_vault():
             print("🗑️ All saved passwords cleared!")
         else:
             print("📝 No saved passwords to clear.")
@@ -192,8 +141,7 @@ class CLIPasswordGenerator:
         exclude_ambiguous = input("Exclude ambiguous characters ({}, [], (), /, \\, |, `, ~)? (y/N): ").strip().lower() == 'y'
         
         try:
-            password = self.generate_password(
-                length=length,
+            charset = self.build_charset(
                 uppercase=uppercase,
                 lowercase=lowercase,
                 numbers=numbers,
@@ -201,12 +149,10 @@ class CLIPasswordGenerator:
                 exclude_similar=exclude_similar,
                 exclude_ambiguous=exclude_ambiguous
             )
+            password = charset.generate(length)
             
-            strength, score = self.check_password_strength(password)
-            
-            print(f"\n🔐 Generated Password: {password}")
-            print(f"📊 Strength: {strength} (Score: {score}/6)")
-            print(f"📏 Length: {len(password)}")
+            print()
+            print_password(password, charset)
             
             # Ask if user wants to save
             save = input("\n💾 Save this password? (y/N): ").strip().lower()
@@ -217,7 +163,163 @@ class CLIPasswordGenerator:
         except ValueError as e:
             print(f"❌ Error: {e}")
 
-def main():
+class PasswordWriter:
+    """Writes generated passwords as plain lines, JSON, JSON Lines or CSV.
+    
+    Each chunk is rendered into one string and written with a single call,
+    straight to the binary buffer underneath a text stream, so bulk output
+    never goes through line-buffered per-password writes. `columns` adds
+    'strength' and/or 'entropy' to every row.
+    """
+    
+    def __init__(self, out, fmt='plain', columns=()):
+        if fmt not in OUTPUT_FORMATS[1:]:
+            raise ValueError(f"Unknown output format: {fmt}")
+        self.fmt = fmt
+        self.columns = tuple(columns)
+        self.count = 0
+        self._out = out
+        self._buffer = getattr(out, 'buffer', None)
+        if self._buffer is not None:
+            out.flush()
+        if fmt == 'csv':
+            self._write(",".join(('password',) + self.columns) + "\n")
+        elif fmt == 'json':
+            self._write("[")
+            
+    def _write(self, text):
+        if self._buffer is not None:
+            self._buffer.write(text.encode('utf-8'))
+        else:
+            self._out.write(text)
+            
+    def write(self, passwords, **values):
+        """Write a chunk of passwords; `values` holds the columns, shared by the whole chunk.
+        
+        Passwords from one charset (or wordlist) and length all have the
+        same exact entropy, so the rating is computed once per chunk.
+        """
+        if not passwords:
+            return
+        extra = [values[column] for column in self.columns]
+        if self.fmt == 'plain':
+            suffix = "".join(f"\t{value}" for value in extra) + "\n"
+            text = suffix.join(passwords) + suffix
+        elif self.fmt == 'csv':
+            suffix = "".join(f",{value}" for value in extra) + "\n"
+            text = suffix.join(map(csv_field, passwords)) + suffix
+        else:
+            import json
+            # The C string encoder json.dumps itself uses, without its per-call overhead
+            from json.encoder import encode_basestring_ascii as quote
+            tail = "".join(f", {quote(column)}: {json.dumps(value)}"
+                           for column, value in zip(self.columns, extra)) + "}"
+            rows = ['{"password": ' + quote(password) + tail for password in passwords]
+            if self.fmt == 'jsonl':
+                text = "\n".join(rows) + "\n"
+            else:
+                text = ("\n  " if not self.count else ",\n  ") + ",\n  ".join(rows)
+        self.count += len(passwords)
+        self._write(text)
+        
+    def close(self):
+        """Finish the output (closing the JSON array) and flush it."""
+        if self.fmt == 'json':
+            self._write("\n]\n" if self.count else "]\n")
+        if self._buffer is not None:
+            self._buffer.flush()
+        else:
+            self._out.flush()
+
+
+def csv_field(value):
+    """A CSV field, quoted only when it has to be (as csv.writer does by default)."""
+    if ',' in value or '"' in value or '\n' in value or '\r' in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def rating(bits):
+    """Column values for passwords with `bits` of entropy."""
+    return {"strength": password_strength.rate_entropy(bits), "entropy": round(bits, 1)}
+
+
+def non_negative_int(value):
+    """argparse type for options that cannot be negative."""
+    import argparse
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, not {number}")
+    return number
+
+
+def print_password(password, charset=None):
+    """Print a generated password with its strength and length."""
+    strength, score, bits = password_strength.analyze(password, charset)
+    print(f"🔐 Generated Password: {password}")
+    print(f"📊 Strength: {strength} (Score: {score}/6, {bits:.0f} bits of entropy)")
+    print(f"📏 Length: {len(password)}")
+
+
+def fast_generate(argv):
+    """Generate and print one password for simple invocations, without argparse.
+    
+    Handles `-l N` plus the charset flags in FAST_FLAGS and returns the exit
+    code; returns None for anything else, or when a breach filter is present,
+    so that main() falls back to the full parser.
+    """
+    if not argv or os.path.exists(BREACH_FILTER_FILE):
+        return None
+    length = 16
+    options = {}
+    args = iter(argv)
+    for arg in args:
+        if arg in FAST_FLAGS:
+            name, value = FAST_FLAGS[arg]
+            options[name] = value
+            continue
+        if arg in ('-l', '--length'):
+            value = next(args, '')
+        elif arg.startswith('--length='):
+            value = arg[len('--length='):]
+        else:
+            return None
+        if not value.isdigit():
+            return None
+        length = int(value)
+        
+    try:
+        charset = password_engine.compile_charset(**options)
+        print_password(charset.generate(length), charset)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # `serve` runs the long-lived HTTP service instead of a one-off command
+    if argv and argv[0] == 'serve':
+        import password_server
+        return password_server.main(argv[1:])
+    # `import` and `export` move saved passwords in and out of the vault
+    if argv and argv[0] in ('import', 'export'):
+        import password_transfer
+        return password_transfer.main(argv)
+        
+    # The common single-password case skips argparse and the vault entirely
+    status = fast_generate(argv)
+    if status is not None:
+        return status
+        
+    import argparse
+    import password_breach
+    import password_passphrase
+    import password_pattern
+    import password_policy
+    import password_vault
+    
     parser = argparse.ArgumentParser(
         description="Generate secure passwords from the command line",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -226,6 +328,15 @@ Examples:
   %(prog)s                    # Interactive mode
   %(prog)s -l 20             # Generate 20-character password
   %(prog)s -l 12 --no-symbols # Generate 12-char password without symbols
+  %(prog)s -c 1000 -o out.txt # Write 1000 passwords to out.txt, one per line
+  %(prog)s -c 1000000 --unique # 1M passwords, none repeated or already in the vault
+  %(prog)s --words 6 --wordlist eff_large_wordlist.txt # 6-word passphrase
+  %(prog)s --template Cvcc-9999-Cvcc # Password following a template
+  %(prog)s --syllables 4 --digits 2  # Pronounceable password
+  %(prog)s serve --port 8765  # Run the local HTTP generation service
+  %(prog)s --stdin            # Answer JSON requests read line by line from stdin
+  %(prog)s export vault.csv   # Export saved passwords (.csv, .jsonl or KeePass .xml)
+  %(prog)s import keepass.xml # Import passwords from a file
   %(prog)s --list            # List saved passwords
   %(prog)s --clear           # Clear saved passwords
         """
@@ -245,55 +356,331 @@ Examples:
                        help='Exclude similar characters (l, 1, I, O, 0)')
     parser.add_argument('--exclude-ambiguous', action='store_true',
                        help='Exclude ambiguous characters ({}, [], (), /, \\, |, `, ~)')
+    parser.add_argument('--include-chars', type=str, default='',
+                       help='Extra characters to add to the character set')
+    parser.add_argument('--exclude-chars', type=str, default='',
+                       help='Characters to remove from the character set')
+    parser.add_argument('--min-upper', type=int, default=0,
+                       help='Require at least this many uppercase letters')
+    parser.add_argument('--min-lower', type=int, default=0,
+                       help='Require at least this many lowercase letters')
+    parser.add_argument('--min-digits', type=int, default=0,
+                       help='Require at least this many numbers')
+    parser.add_argument('--min-symbols', type=int, default=0,
+                       help='Require at least this many symbols')
+    parser.add_argument('--max-repeat', type=int, default=None,
+                       help='Never repeat a character more than this many times in a row')
+    parser.add_argument('--forbid', action='append', default=[], metavar='SEQUENCE',
+                       help='Never include this sequence, case-insensitively (repeatable)')
+    parser.add_argument('--words', type=int, default=None,
+                       help='Generate a passphrase of this many words instead of a password')
+    parser.add_argument('--template', type=str, default=None, metavar='PATTERN',
+                       help='Generate a password following a template: C/c consonant, '
+                            'V/v vowel, A/a letter, 9 digit, # symbol, x letter or digit; '
+                            'other characters are kept (\\ escapes one)')
+    parser.add_argument('--syllables', type=int, default=None,
+                       help='Generate a pronounceable password of this many syllables')
+    parser.add_argument('--separator', type=str, default=None,
+                       help='Separator between passphrase words (default: -) '
+                            'or pronounceable syllables (default: none)')
+    parser.add_argument('--capitalize', action='store_true',
+                       help='Capitalize each passphrase word, or the first pronounceable syllable')
+    parser.add_argument('--digits', type=int, default=0,
+                       help='Append this many random digits to one passphrase word '
+                            'or to a pronounceable password')
+    parser.add_argument('--wordlist', type=str, default=None,
+                       help='Wordlist file for passphrases; required with --words unless '
+                            f'{password_passphrase.DEFAULT_WORDLIST_FILE} is in the working directory '
+                            'or next to this program')
+    parser.add_argument('-c', '--count', type=int, default=None,
+                       help='Generate COUNT passwords, one per line (batch mode)')
+    parser.add_argument('-o', '--output', type=str, default=None,
+                       help='Write batch output to this file instead of stdout')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                       help='Number of processes to use in batch mode (default: 1)')
+    parser.add_argument('--unique', action='store_true',
+                       help='Never output a password twice or one already in the vault')
     parser.add_argument('--save', action='store_true',
                        help='Save generated password')
     parser.add_argument('--description', type=str, default='',
                        help='Description for saved password')
+    parser.add_argument('--vault', type=str, default=None,
+                       help='Vault file to use (default: cli_saved_passwords.jsonl; '
+                            '.db/.sqlite files use the SQLite backend)')
+    parser.add_argument('--encrypt', action='store_true',
+                       help='Encrypt the vault with a master password (converts a plaintext vault; '
+                            f'the password is read from ${MASTER_PASSWORD_ENV} or prompted for)')
+    parser.add_argument('--breach-filter', type=str, default=None,
+                       help='Breach filter file to check generated passwords against '
+                            f'(default: {password_breach.DEFAULT_FILTER_FILE} if it exists)')
+    parser.add_argument('--build-breach-filter', type=str, metavar='CORPUS', default=None,
+                       help='Build the breach filter from a file of SHA-1 hashes (one per line, '
+                            'optionally HASH:count) and exit')
+    parser.add_argument('--plaintext-corpus', action='store_true',
+                       help='With --build-breach-filter, the corpus lists passwords instead of hashes')
     parser.add_argument('--list', action='store_true',
                        help='List saved passwords')
+    parser.add_argument('--search', type=str, default=None,
+                       help='With --list, only show entries whose description contains this text')
+    parser.add_argument('--since', type=str, default=None,
+                       help='With --list, only show entries created on/after this date (YYYY-MM-DD[ HH:MM:SS])')
+    parser.add_argument('--until', type=str, default=None,
+                       help='With --list, only show entries created on/before this date (YYYY-MM-DD[ HH:MM:SS])')
+    parser.add_argument('--min-length', type=int, default=None,
+                       help='With --list, only show passwords at least this long')
+    parser.add_argument('--limit', type=non_negative_int, default=None,
+                       help='With --list, show at most this many entries')
+    parser.add_argument('--offset', type=non_negative_int, default=0,
+                       help='With --list, skip this many matching entries first')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default=None,
+                       help='Output format for generated passwords and --list (default: table; '
+                            'batches default to plain, one password per line)')
+    parser.add_argument('--with-strength', action='store_true',
+                       help='With a --format other than table, add a strength column')
+    parser.add_argument('--with-entropy', action='store_true',
+                       help='With a --format other than table, add an entropy (bits) column')
     parser.add_argument('--clear', action='store_true',
                        help='Clear all saved passwords')
     parser.add_argument('--interactive', '-i', action='store_true',
                        help='Run in interactive mode')
+    parser.add_argument('--stdin', action='store_true',
+                       help='Read JSON generation requests from stdin, one per line, and '
+                            'write one JSON result per line until end of input')
+    
+    args = parser.parse_args(argv)
     
-    args = parser.parse_args()
+    if args.count is not None and args.save:
+        parser.error("--save cannot be combined with --count")
+    modes = [flag for flag, value in (('--words', args.words), ('--template', args.template),
+                                      ('--syllables', args.syllables)) if value is not None]
+    if len(modes) > 1:
+        parser.error(f"{' and '.join(modes)} cannot be combined")
+    if modes and args.workers > 1:
+        parser.error(f"--workers is not supported with {modes[0]}")
+    # No wordlist is shipped, so passphrases need one from the user
+    if (args.words is not None and not args.wordlist
+            and password_passphrase.default_wordlist() is None):
+        parser.error(f"--words needs --wordlist FILE (no {password_passphrase.DEFAULT_WORDLIST_FILE} "
+                     "was found); the EFF large wordlist is a good choice")
     
-    generator = CLIPasswordGenerator()
+    generator = CLIPasswordGenerator(args.vault, args.breach_filter)
+    # Encrypted vaults ask for the master password when first opened
+    if args.encrypt or password_vault.is_encrypted(generator.saved_passwords_file):
+        generator.master_password = read_master_password
     
     # Handle special commands
-    if args.list:
-        generator.list_saved_passwords()
+    if args.build_breach_filter:
+        filter_path = args.breach_filter or password_breach.DEFAULT_FILTER_FILE
+        print(f"🔨 Building breach filter {filter_path} from {args.build_breach_filter}...")
+        try:
+            count = password_breach.build_filter(
+                args.build_breach_filter, filter_path,
+                plaintext=args.plaintext_corpus,
+                progress=lambda n: print(f"   {n:,} entries added...")
+            )
+        except (OSError, ValueError) as e:
+            print(f"❌ Error: {e}")
+            return 1
+        print(f"✅ Breach filter built with {count:,} entries.")
+        return 0
+    elif args.list:
+        until = args.until
+        # A bare date means "up to the end of that day"
+        if until and len(until) == 10:
+            until += " 23:59:59"
+        generator.list_saved_passwords(
+            search=args.search,
+            since=args.since,
+            until=until,
+            min_length=args.min_length,
+            limit=args.limit,
+            offset=args.offset,
+            fmt=args.format or 'table'
+        )
         return
     elif args.clear:
         generator.clear_saved_passwords()
         return
+    elif args.stdin:
+        import password_server
+        service = password_server.PasswordService(args.vault, args.breach_filter, args.wordlist)
+        password_server.serve_lines(service, sys.stdin, sys.stdout)
+        return 0
     elif args.interactive or len([arg for arg in vars(args).values() if arg]) == 0:
         generator.interactive_mode()
         return
         
-    # Generate password with specified options
-    try:
-        password = generator.generate_password(
-            length=args.length,
-            uppercase=not args.no_uppercase,
-            lowercase=not args.no_lowercase,
-            numbers=not args.no_numbers,
-            symbols=not args.no_symbols,
-            exclude_similar=args.exclude_similar,
-            exclude_ambiguous=args.exclude_ambiguous
+    options = dict(
+        uppercase=not args.no_uppercase,
+        lowercase=not args.no_lowercase,
+        numbers=not args.no_numbers,
+        symbols=not args.no_symbols,
+        exclude_similar=args.exclude_similar,
+        exclude_ambiguous=args.exclude_ambiguous,
+        include=args.include_chars,
+        exclude=args.exclude_chars
+    )
+    
+    # Generated passwords found in the breach filter are replaced
+    reject = generator.is_breached if generator.breach_checker else None
+    # ...and so are repeats within the batch and passwords already in the vault
+    if args.unique:
+        reject = generator.unique_filter(args.count or 1, reject)
+    
+    columns = [name for name, wanted in (('strength', args.with_strength),
+                                         ('entropy', args.with_entropy)) if wanted]
+    # Batches are plain lines unless asked otherwise; single passwords get the emoji display
+    fmt = args.format or ('plain' if args.count is not None else 'table')
+    # Structured output keeps stdout for the data alone; messages go to stderr
+    messages = sys.stdout if fmt == 'table' else sys.stderr
+    
+    policy = None
+    if (args.min_upper or args.min_lower or args.min_digits or args.min_symbols
+            or args.max_repeat is not None or args.forbid):
+        try:
+            policy = password_policy.PasswordPolicy(
+                min_upper=args.min_upper,
+                min_lower=args.min_lower,
+                min_digits=args.min_digits,
+                min_symbols=args.min_symbols,
+                max_consecutive=args.max_repeat,
+                forbidden=args.forbid
+            )
+        except ValueError as e:
+            print(f"❌ Error: {e}", file=messages)
+            return 1
+    
+    if args.words is not None:
+        passphrase_options = dict(
+            words=args.words,
+            separator='-' if args.separator is None else args.separator,
+            capitalize=args.capitalize,
+            digits=args.digits,
+            wordlist=args.wordlist
         )
+    elif args.syllables is not None:
+        pronounceable_options = dict(
+            syllables=args.syllables,
+            separator=args.separator or '',
+            capitalize=args.capitalize,
+            digits=args.digits
+        )
+    
+    def entropy_of(password):
+        """Exact entropy of anything generated with these options, e.g. `password`."""
+        if args.words is not None:
+            wordlist = password_passphrase.open_wordlist(args.wordlist)
+            return password_passphrase.passphrase_entropy(wordlist, args.words, args.digits)
+        if args.template is not None:
+            return password_pattern.template_entropy(args.template)
+        if args.syllables is not None:
+            return password_pattern.pronounceable_entropy(args.syllables, args.digits)
+        return password_strength.estimate_entropy(password, generator.build_charset(**options))
+    
+    # Batch mode: stream passwords as they are produced
+    if args.count is not None:
+        out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+        try:
+            if args.words is not None:
+                chunks = generator.generate_passphrase_chunks(args.count, reject=reject,
+                                                              **passphrase_options)
+            elif args.template is not None:
+                chunks = generator.generate_template_chunks(args.count, args.template, reject)
+            elif args.syllables is not None:
+                chunks = generator.generate_pronounceable_chunks(args.count, reject=reject,
+                                                                 **pronounceable_options)
+            else:
+                chunks = generator.generate_chunks(args.count, args.length, args.workers,
+                                                   reject, policy, **options)
+            # The writer starts once the options have been accepted, so errors leave no partial output
+            writer = None
+            values = {}
+            for chunk in chunks:
+                if writer is None:
+                    writer = PasswordWriter(out, 'plain' if fmt == 'table' else fmt, columns)
+                if columns and not values and chunk:
+                    values = rating(entropy_of(chunk[0]))
+                writer.write(chunk, **values)
+            writer.close()
+        except (OSError, ValueError) as e:
+            print(f"❌ Error: {e}", file=sys.stderr)
+            return 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        return 0
+    
+    if args.words is not None:
+        try:
+            chunk = next(generator.generate_passphrase_chunks(1, reject=reject, **passphrase_options))
+            passphrase = chunk[0]
+            wordlist = password_passphrase.open_wordlist(args.wordlist)
+        except (OSError, ValueError) as e:
+            print(f"❌ Error: {e}", file=messages)
+            return 1
+            
+        bits = password_passphrase.passphrase_entropy(wordlist, args.words, args.digits)
         
-        strength, score = generator.check_password_strength(password)
+        if fmt != 'table':
+            writer = PasswordWriter(sys.stdout, fmt, columns)
+            writer.write([passphrase], **rating(bits))
+            writer.close()
+        else:
+            print(f"🔐 Generated Passphrase: {passphrase}")
+            print(f"📊 Strength: {password_strength.rate_entropy(bits)} ({bits:.0f} bits of entropy)")
+            print(f"📏 Words: {args.words} (from {len(wordlist):,}-word list)")
         
-        print(f"🔐 Generated Password: {password}")
-        print(f"📊 Strength: {strength} (Score: {score}/6)")
-        print(f"📏 Length: {len(password)}")
+        if args.save:
+            generator.save_password(passphrase, args.description, messages)
+        return 0
+        
+    if args.template is not None or args.syllables is not None:
+        try:
+            if args.template is not None:
+                chunk = next(generator.generate_template_chunks(1, args.template, reject))
+            else:
+                chunk = next(generator.generate_pronounceable_chunks(1, reject=reject,
+                                                                     **pronounceable_options))
+            password = chunk[0]
+        except ValueError as e:
+            print(f"❌ Error: {e}", file=messages)
+            return 1
+            
+        bits = entropy_of(password)
+        
+        if fmt != 'table':
+            writer = PasswordWriter(sys.stdout, fmt, columns)
+            writer.write([password], **rating(bits))
+            writer.close()
+        else:
+            print(f"🔐 Generated Password: {password}")
+            print(f"📊 Strength: {password_strength.rate_entropy(bits)} ({bits:.0f} bits of entropy)")
+            if args.template is not None:
+                print(f"🧩 Template: {args.template} ({len(password)} characters)")
+            else:
+                print(f"📏 Syllables: {args.syllables} ({len(password)} characters)")
+        
+        if args.save:
+            generator.save_password(password, args.description, messages)
+        return 0
+        
+    # Generate password with specified options
+    try:
+        charset = generator.build_charset(**options)
+        password = next(generator.generate_many(1, args.length, reject=reject, policy=policy,
+                                                **options))
+        if fmt != 'table':
+            writer = PasswordWriter(sys.stdout, fmt, columns)
+            writer.write([password], **rating(password_strength.estimate_entropy(password, charset)))
+            writer.close()
+        else:
+            print_password(password, charset)
         
         if args.save:
-            generator.save_password(password, args.description)
+            generator.save_password(password, args.description, messages)
             
     except ValueError as e:
-        print(f"❌ Error: {e}")
+        print(f"❌ Error: {e}", file=messages)
         return 1
         
     return 0
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Password Generator Benchmarks
+Measures the hot paths and compares them against a saved baseline.
+
+Run as a module:
+  python -m password_benchmark --output bench.json
+  python -m password_benchmark --baseline bench.json    # fails on regressions
+
+Covered:
+  - generate_password throughput for lengths 8-128 and every charset combination
+  - check_password_strength throughput
+  - save_password and load_saved_passwords latency at several vault sizes,
+    for both the JSON Lines and SQLite backends
+  - cold start of `cli_password_generator.py -l 20`, against a target
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from cli_password_generator import CLIPasswordGenerator
+from password_vault import make_record
+
+LENGTHS = (8, 16, 32, 64, 128)
+QUICK_LENGTHS = (8, 16, 128)
+VAULT_SIZES = (10, 10000, 1000000)
+QUICK_VAULT_SIZES = (10, 10000)
+VAULT_BACKENDS = ('jsonl', 'db')
+
+CHARSET_FLAGS = ('uppercase', 'lowercase', 'numbers', 'symbols',
+                 'exclude_similar', 'exclude_ambiguous')
+# One letter per flag for compact result names, e.g. "ULNS--"
+FLAG_LETTERS = 'ULNSsa'
+
+# A result moving this far in the wrong direction counts as a regression
+DEFAULT_THRESHOLD = 0.20
+
+SAVES_PER_VAULT = 50
+FILL_BATCH = 10000
+
+STARTUP_RUNS = 20
+# Cold start target for a single password, in ms on top of a bare interpreter
+STARTUP_TARGET_MS = 50
+CLI_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cli_password_generator.py')
+
+
+def measure_rate(fn, min_time):
+    """Call fn repeatedly for at least min_time seconds and return calls per second."""
+    calls = 0
+    batch = 1
+    start = time.perf_counter()
+    while True:
+        for _ in range(batch):
+            fn()
+        calls += batch
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return calls / elapsed
+        batch *= 2
+
+
+def _charset_combinations():
+    for values in itertools.product((True, False), repeat=len(CHARSET_FLAGS)):
+        options = dict(zip(CHARSET_FLAGS, values))
+        if any(values[:4]):
+            yield options
+
+
+def _combination_name(options):
+    return ''.join(letter if options[flag] else '-'
+                   for flag, letter in zip(CHARSET_FLAGS, FLAG_LETTERS))
+
+
+def bench_generation(generator, lengths, min_time):
+    results = {}
+    for length in lengths:
+        for options in _charset_combinations():
+            rate = measure_rate(lambda: generator.generate_password(length, **options), min_time)
+            name = f"generate/length={length}/{_combination_name(options)}"
+            results[name] = {"value": rate, "unit": "passwords/s", "higher_is_better": True}
+    return results
+
+
+def bench_strength(generator, min_time):
+    samples = [generator.generate_password(length) for length in LENGTHS] + ["abc123", "password"]
+    rate = measure_rate(lambda: [generator.check_password_strength(p) for p in samples], min_time)
+    return {"strength/check_password_strength": {
+        "value": rate * len(samples), "unit": "passwords/s", "higher_is_better": True}}
+
+
+def _fill_vault(vault, size):
+    record = make_record("x" * 16, "benchmark")
+    for start in range(0, size, FILL_BATCH):
+        vault.append_many([record] * min(FILL_BATCH, size - start))
+
+
+def bench_vault(generator, sizes, backends):
+    results = {}
+    for backend, size in itertools.product(backends, sizes):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, f"vault.{backend}")
+            filler = CLIPasswordGenerator(path)
+            _fill_vault(filler.vault, size)
+
+            # Each save goes through a fresh generator, as a CLI invocation would;
+            # passwords differ so none is turned away as a duplicate
+            timings = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(SAVES_PER_VAULT):
+                    cli = CLIPasswordGenerator(path)
+                    password = generator.generate_password()
+                    start = time.perf_counter()
+                    cli.save_password(password, "benchmark")
+                    timings.append(time.perf_counter() - start)
+            timings.sort()
+            results[f"vault/{backend}/size={size}/save_password"] = {
+                "value": timings[len(timings) // 2] * 1000, "unit": "ms", "higher_is_better": False}
+
+            cli = CLIPasswordGenerator(path)
+            start = time.perf_counter()
+            cli.load_saved_passwords()
+            loaded = sum(1 for _ in cli.vault)
+            elapsed = time.perf_counter() - start
+            assert loaded == size + SAVES_PER_VAULT
+            results[f"vault/{backend}/size={size}/load_saved_passwords"] = {
+                "value": elapsed * 1000, "unit": "ms", "higher_is_better": False}
+    return results
+
+
+def _median_run_time(command, runs, cwd):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, stdout=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+def bench_startup(runs=STARTUP_RUNS):
+    # Run from an empty directory so no vault or breach filter is picked up
+    with tempfile.TemporaryDirectory() as tmp:
+        interpreter = _median_run_time([sys.executable, '-c', 'pass'], runs, tmp)
+        cli = _median_run_time([sys.executable, CLI_SCRIPT, '-l', '20'], runs, tmp)
+    return {
+        "startup/interpreter": {"value": interpreter, "unit": "ms", "higher_is_better": False},
+        "startup/cli_generate": {"value": cli, "unit": "ms", "higher_is_better": False},
+    }
+
+
+def run_benchmarks(lengths=LENGTHS, vault_sizes=VAULT_SIZES, backends=VAULT_BACKENDS,
+                   min_time=0.2, startup_runs=STARTUP_RUNS, progress=None):
+    """Run every benchmark and return {name: {"value", "unit", "higher_is_better"}}."""
+    generator = CLIPasswordGenerator()
+    results = {}
+    for label, bench in (
+            ("generation", lambda: bench_generation(generator, lengths, min_time)),
+            ("strength", lambda: bench_strength(generator, min_time)),
+            ("vault", lambda: bench_vault(generator, vault_sizes, backends)),
+            ("startup", lambda: bench_startup(startup_runs))):
+        if progress:
+            progress(label)
+        results.update(bench())
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return (name, baseline value, current value, change) for every regressed result."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old, new = baseline[name]["value"], result["value"]
+        if not old:
+            continue
+        change = (new - old) / old
+        worse = -change if result["higher_is_better"] else change
+        if worse > threshold:
+            regressions.append((name, old, new, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark password generation, strength scoring and vault I/O")
+    parser.add_argument('--output', '-o', type=str, default=None,
+                       help='Write results as JSON to this file')
+    parser.add_argument('--baseline', '-b', type=str, default=None,
+                       help='Compare against results saved by an earlier --output run')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                       help=f'Relative slowdown that counts as a regression (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--quick', action='store_true',
+                       help='Fewer lengths and no 1M-entry vault, for a fast check')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                       help='Seconds to spend on each throughput measurement (default: 0.2)')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        lengths=QUICK_LENGTHS if args.quick else LENGTHS,
+        vault_sizes=QUICK_VAULT_SIZES if args.quick else VAULT_SIZES,
+        min_time=args.min_time,
+        progress=lambda label: print(f"⏱️ Running {label} benchmarks...", file=sys.stderr)
+    )
+
+    for name, result in results.items():
+        print(f"{name:<55} {result['value']:>14,.2f} {result['unit']}")
+
+    overhead = results["startup/cli_generate"]["value"] - results["startup/interpreter"]["value"]
+    met = "✅" if overhead <= STARTUP_TARGET_MS else "❌"
+    print(f"\n{met} Cold start: {overhead:.1f} ms over a bare interpreter (target: {STARTUP_TARGET_MS} ms)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "results": results,
+            }, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for name, old, new, change in regressions:
+                print(f"   {name}: {old:,.2f} -> {new:,.2f} ({change:+.0%})")
+            return 1
+        print(f"\n✅ No regressions against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
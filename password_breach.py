@@ -0,0 +1,138 @@
+"""
+Breached Password Checking
+Checks passwords against a local breached-password corpus via a Bloom filter.
+
+The corpus (one SHA-1 hash per line, optionally followed by ":count" as in
+the Have I Been Pwned downloads) is compiled once into an on-disk Bloom
+filter. Lookups memory-map the filter and probe a handful of bits, so each
+check takes microseconds and the corpus is never loaded into RAM. Because
+SHA-1 digests are already uniformly distributed, the probe positions are
+taken straight from the digest by double hashing.
+
+A Bloom filter never misses a breached password, but may rarely flag a
+password that is not in the corpus (at the false-positive rate it was built
+with).
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+
+DEFAULT_FILTER_FILE = 'breached_passwords.bloom'
+
+MAGIC = b'PWBLOOM1'
+# Magic, number of bits, number of probes, number of items
+HEADER = struct.Struct('<8sQIQ')
+
+
+def _probes(digest, bits, probes):
+    """Yield the bit positions for a SHA-1 digest."""
+    h1, h2 = struct.unpack_from('<QQ', digest)
+    h2 |= 1
+    for i in range(probes):
+        yield (h1 + i * h2) % bits
+
+
+def _corpus_digests(corpus_path, plaintext=False):
+    """Yield SHA-1 digests from a corpus file of hashes (or plain passwords)."""
+    with open(corpus_path, 'rb') as f:
+        for line in f:
+            line = line.rstrip(b'\r\n')
+            if not line:
+                continue
+            if plaintext:
+                yield hashlib.sha1(line).digest()
+            else:
+                yield bytes.fromhex(line.split(b':', 1)[0].decode('ascii'))
+
+
+def build_filter(corpus_path, filter_path=DEFAULT_FILTER_FILE, false_positive_rate=0.001,
+                 expected_items=None, plaintext=False, progress=None):
+    """Compile a breach corpus into a Bloom filter file and return the item count.
+
+    `expected_items` defaults to the number of lines in the corpus. Set
+    `plaintext` when the corpus lists passwords rather than SHA-1 hashes.
+    `progress`, if given, is called with the number of items added so far.
+    """
+    if not 0 < false_positive_rate < 1:
+        raise ValueError("False positive rate must be between 0 and 1!")
+    if expected_items is None:
+        with open(corpus_path, 'rb') as f:
+            expected_items = sum(1 for line in f if line.strip())
+    expected_items = max(expected_items, 1)
+
+    bits = max(8, int(-expected_items * math.log(false_positive_rate) / math.log(2) ** 2))
+    probes = max(1, round(bits / expected_items * math.log(2)))
+    size = HEADER.size + (bits + 7) // 8
+
+    tmp_path = filter_path + '.tmp'
+    count = 0
+    with open(tmp_path, 'w+b') as f:
+        f.truncate(size)
+        # The bit array is written through a memory map so it never has to fit in RAM
+        with mmap.mmap(f.fileno(), size) as mm:
+            offset = HEADER.size
+            for digest in _corpus_digests(corpus_path, plaintext):
+                for bit in _probes(digest, bits, probes):
+                    mm[offset + (bit >> 3)] |= 1 << (bit & 7)
+                count += 1
+                if progress and count % 1000000 == 0:
+                    progress(count)
+            mm[:HEADER.size] = HEADER.pack(MAGIC, bits, probes, count)
+            mm.flush()
+    os.replace(tmp_path, filter_path)
+    return count
+
+
+class BreachChecker:
+    """Memory-mapped lookups against a compiled breach Bloom filter."""
+
+    def __init__(self, filter_path=DEFAULT_FILTER_FILE):
+        self.filter_path = filter_path
+        self._file = open(filter_path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, self.bits, self.probes, self.items = HEADER.unpack_from(self._mm)
+        except (ValueError, struct.error):
+            self._file.close()
+            raise ValueError(f"{filter_path} is not a breach filter file!")
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{filter_path} is not a breach filter file!")
+
+    def contains_digest(self, digest):
+        """Check a raw 20-byte SHA-1 digest."""
+        mm = self._mm
+        offset = HEADER.size
+        for bit in _probes(digest, self.bits, self.probes):
+            if not mm[offset + (bit >> 3)] & (1 << (bit & 7)):
+                return False
+        return True
+
+    def contains_hash(self, sha1_hex):
+        """Check a hex-encoded SHA-1 hash."""
+        return self.contains_digest(bytes.fromhex(sha1_hex))
+
+    def is_breached(self, password):
+        """Check whether a password appears in the breach corpus."""
+        return self.contains_digest(hashlib.sha1(password.encode('utf-8')).digest())
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_default_checker(filter_path=None):
+    """Open `filter_path`, or the default filter file if it exists; None if there is none."""
+    path = filter_path or DEFAULT_FILTER_FILE
+    if filter_path is None and not os.path.exists(path):
+        return None
+    return BreachChecker(path)
@@ -0,0 +1,359 @@
+"""
+Password Generator Core
+Headless generation, strength scoring and vault access shared by every front end.
+
+The CLI, the Tk GUI, the HTTP/stdin service and import/export all sit on
+PasswordCore, and third-party code can use it directly: importing it
+loads only the generation engine and strength scorer, never tkinter or
+pyperclip, and the vault, breach filter, passphrase and policy modules
+(and the standard library modules behind them) are imported the first
+time they are used.
+"""
+
+import os
+import sys
+
+import password_engine
+import password_strength
+
+DEFAULT_VAULT_FILE = 'cli_saved_passwords.jsonl'
+# Single-file JSON vault of older versions, migrated on first use
+LEGACY_VAULT_FILE = 'cli_saved_passwords.json'
+
+# Passwords generated per engine call in batch mode
+BATCH_SIZE = 1024
+
+# Consecutive fully rejected batches before batch generation gives up
+MAX_STALLED_BATCHES = 100
+
+# Environment variable scripts can use to supply the vault's master password
+MASTER_PASSWORD_ENV = 'PASSWORD_VAULT_MASTER_PASSWORD'
+
+
+def read_master_password():
+    """The vault master password, from the environment or a hidden prompt."""
+    password = os.environ.get(MASTER_PASSWORD_ENV)
+    if password:
+        return password
+    import getpass
+    try:
+        return getpass.getpass("🔑 Vault master password: ")
+    except EOFError:
+        return ''
+
+
+class PasswordCore:
+    """Password generation, strength scoring and the saved-password vault, without any UI.
+    
+    Nothing here prints except warnings about files that cannot be opened,
+    and the vault, breach filter and duplicate index are only opened when
+    first used, so constructing one is cheap.
+    """
+    
+    def __init__(self, vault_file=None, breach_filter=None, master_password=None,
+                 legacy_file=None):
+        # .db/.sqlite vault files use the SQLite backend, anything else JSON Lines
+        self.saved_passwords_file = vault_file or DEFAULT_VAULT_FILE
+        # Vaults from older versions are migrated on first use
+        self.legacy_passwords_file = legacy_file or (None if vault_file else LEGACY_VAULT_FILE)
+        # Encrypts the vault; may be a callable that asks for the password when the vault is opened
+        self.master_password = master_password
+        # The vault is only opened by commands that need it
+        self._vault = None
+        self._vault_loaded = False
+        # Why the vault could not be opened, if it could not
+        self.vault_error = None
+        # Breach filter file; the default one is used if present
+        self.breach_filter = breach_filter
+        self._breach_checker = None
+        self._breach_checker_loaded = False
+        # Keyed-hash index of the vault's passwords, for duplicate checks
+        self._dedupe_index = None
+        self._dedupe_index_loaded = False
+        
+    @property
+    def vault(self):
+        """The saved-password vault, opened on first use (None if it cannot be opened)."""
+        if not self._vault_loaded:
+            self.load_saved_passwords()
+        return self._vault
+        
+    @property
+    def breach_checker(self):
+        """BreachChecker for the configured filter, opened on first use (None if there is none)."""
+        if not self._breach_checker_loaded:
+            self._breach_checker_loaded = True
+            import password_breach
+            try:
+                self._breach_checker = password_breach.open_default_checker(self.breach_filter)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not open breach filter: {e}", file=sys.stderr)
+        return self._breach_checker
+        
+    @property
+    def dedupe_index(self):
+        """DedupeIndex of the vault's passwords, opened (or rebuilt) on first use (None without a vault)."""
+        if not self._dedupe_index_loaded:
+            self._dedupe_index_loaded = True
+            vault = self.vault
+            if vault is not None:
+                import password_dedupe
+                try:
+                    self._dedupe_index = password_dedupe.open_index(vault)
+                except (OSError, ValueError) as e:
+                    print(f"Warning: Could not open duplicate index: {e}", file=sys.stderr)
+        return self._dedupe_index
+        
+    def unique_filter(self, expected=0, reject=None):
+        """A reject function for generate_chunks that drops passwords seen before.
+        
+        A password is rejected if `reject` rejects it, if it is already in
+        the vault, or if an earlier password of the same batch was accepted
+        with it, so every accepted password is unique. `expected` is the
+        batch size, used to size the batch's fingerprint table up front.
+        """
+        import password_dedupe
+        index = self.dedupe_index
+        # Sharing the vault index's key means each password is hashed only once
+        key = index.key if index is not None else os.urandom(password_dedupe.KEY_SIZE)
+        seen = password_dedupe.FingerprintSet(key, expected)
+        
+        def reject_seen(password):
+            if reject is not None and reject(password):
+                return True
+            fp = password_dedupe.fingerprint(key, password)
+            return (index is not None and fp in index) or not seen.add(fp)
+        return reject_seen
+        
+    def is_breached(self, password):
+        """Check a password against the breach filter (False if no filter is available)."""
+        checker = self.breach_checker
+        return checker is not None and checker.is_breached(password)
+        
+    @property
+    def saved_passwords(self):
+        """All saved passwords as a list. Prefer iterating self.vault for large vaults."""
+        return list(self.vault) if self.vault is not None else []
+        
+    def load_saved_passwords(self):
+        """Open the vault. Records are streamed from it on demand, not loaded up front."""
+        self._vault_loaded = True
+        # A reopened vault gets its duplicate index reopened with it
+        if self._dedupe_index is not None:
+            self._dedupe_index.close()
+        self._dedupe_index = None
+        self._dedupe_index_loaded = False
+        self.vault_error = None
+        from password_vault import EncryptedJsonlVault, open_vault
+        try:
+            master_password = self.master_password
+            if callable(master_password):
+                master_password = master_password()
+            self._vault = open_vault(self.saved_passwords_file, self.legacy_passwords_file,
+                                     master_password)
+        except Exception as e:
+            self._vault = None
+            self.vault_error = e
+            print(f"Warning: Could not load saved passwords: {e}", file=sys.stderr)
+            return
+        legacy = self.legacy_passwords_file
+        if isinstance(self._vault, EncryptedJsonlVault) and legacy:
+            if self._vault.legacy_removed:
+                print(f"⚠️ Deleted {legacy}: its passwords are now encrypted in "
+                      f"{self.saved_passwords_file}", file=sys.stderr)
+            elif os.path.exists(legacy):
+                print(f"⚠️ WARNING: {legacy} still holds saved passwords in PLAINTEXT. "
+                      f"Delete it once you have checked that {self.saved_passwords_file} "
+                      f"has them.", file=sys.stderr)
+            
+    def build_charset(self, uppercase=True, lowercase=True, numbers=True,
+                      symbols=True, exclude_similar=False, exclude_ambiguous=False,
+                      include='', exclude=''):
+        """Return the compiled (and cached) character set for the given options."""
+        return password_engine.compile_charset(
+            uppercase, lowercase, numbers, symbols,
+            exclude_similar, exclude_ambiguous, include, exclude
+        )
+        
+    def generate_password(self, length=16, uppercase=True, lowercase=True, 
+                         numbers=True, symbols=True, exclude_similar=False, 
+                         exclude_ambiguous=False, include='', exclude=''):
+        """Generate a password with specified criteria."""
+        charset = self.build_charset(uppercase, lowercase, numbers, symbols,
+                                     exclude_similar, exclude_ambiguous,
+                                     include, exclude)
+        return charset.generate(length)
+        
+    def generate_chunks(self, count, length=16, workers=1, reject=None, policy=None,
+                        **charset_options):
+        """Yield lists of passwords totalling `count`, using the same options as generate_password.
+        
+        With workers > 1 the batch is sharded across a process pool; chunks
+        are still yielded in order. Passwords for which `reject(password)` is
+        true are dropped and replaced. A PasswordPolicy makes every password
+        meet its class minimums, repeat limit and forbidden sequences.
+        """
+        if count < 1:
+            raise ValueError("Count must be at least 1!")
+        if workers < 1:
+            raise ValueError("Workers must be at least 1!")
+            
+        charset = self.build_charset(**charset_options)
+        if policy is not None:
+            if workers > 1:
+                raise ValueError("Policies are not supported with multiple workers!")
+            import password_policy
+            yield from self._batched(count, lambda n: password_policy.generate_passwords(
+                charset, length, n, policy), reject)
+            return
+        if workers > 1:
+            source = password_engine.generate_parallel_chunks(charset, length, count, workers)
+        else:
+            source = None
+        yield from self._batched(count, lambda n: charset.generate_batch(length, n),
+                                 reject, source)
+            
+    def _batched(self, count, make_batch, reject=None, source=None):
+        """Yield chunks of up to BATCH_SIZE items from make_batch(n), totalling `count`.
+        
+        Items come from `source` (an iterable of chunks) first when given.
+        Items for which `reject(item)` is true are dropped and replaced.
+        """
+        if source is None:
+            source = (make_batch(min(BATCH_SIZE, count - start))
+                      for start in range(0, count, BATCH_SIZE))
+            
+        remaining = count
+        for chunk in source:
+            if reject is not None:
+                chunk = [p for p in chunk if not reject(p)]
+            remaining -= len(chunk)
+            yield chunk
+            
+        # Top up anything that was rejected
+        stalls = 0
+        while remaining:
+            chunk = [p for p in make_batch(min(remaining, BATCH_SIZE)) if not reject(p)]
+            if not chunk:
+                stalls += 1
+                if stalls >= MAX_STALLED_BATCHES:
+                    raise ValueError("Could not generate enough acceptable passwords with these options!")
+                continue
+            stalls = 0
+            remaining -= len(chunk)
+            yield chunk
+            
+    def generate_many(self, count, length=16, workers=1, reject=None, policy=None,
+                      **charset_options):
+        """Yield `count` passwords one at a time, using the same options as generate_password."""
+        for chunk in self.generate_chunks(count, length, workers, reject, policy,
+                                          **charset_options):
+            yield from chunk
+            
+    def generate_passphrase_chunks(self, count, words=6, separator='-', capitalize=False,
+                                   digits=0, wordlist=None, reject=None):
+        """Yield lists of passphrases totalling `count`, drawn from a wordlist file."""
+        if count < 1:
+            raise ValueError("Count must be at least 1!")
+            
+        import password_passphrase
+        compiled = password_passphrase.open_wordlist(wordlist)
+        yield from self._batched(count, lambda n: password_passphrase.generate_passphrases(
+            compiled, words, n, separator, capitalize, digits), reject)
+            
+    def generate_passphrase(self, words=6, separator='-', capitalize=False, digits=0,
+                            wordlist=None, reject=None):
+        """Generate a diceware-style passphrase."""
+        chunk = next(self.generate_passphrase_chunks(1, words, separator, capitalize,
+                                                     digits, wordlist, reject))
+        return chunk[0]
+        
+    def passphrase_entropy(self, words=6, digits=0, wordlist=None):
+        """Exact entropy in bits of passphrases generated with these settings."""
+        import password_passphrase
+        compiled = password_passphrase.open_wordlist(wordlist)
+        return password_passphrase.passphrase_entropy(compiled, words, digits)
+
+    def generate_template_chunks(self, count, template, reject=None):
+        """Yield lists of passwords totalling `count`, each following a template like "Cvcc-9999"."""
+        if count < 1:
+            raise ValueError("Count must be at least 1!")
+
+        import password_pattern
+        # Compile now so a bad template fails before anything is generated
+        password_pattern.compile_template(template)
+        yield from self._batched(count, lambda n: password_pattern.generate_from_template(
+            template, n), reject)
+
+    def generate_pronounceable_chunks(self, count, syllables=4, separator='', capitalize=False,
+                                      digits=0, reject=None):
+        """Yield lists of pronounceable passwords totalling `count`, walked from syllable transitions."""
+        if count < 1:
+            raise ValueError("Count must be at least 1!")
+        if syllables < 1:
+            raise ValueError("Pronounceable passwords need at least one syllable!")
+
+        import password_pattern
+        yield from self._batched(count, lambda n: password_pattern.generate_pronounceable(
+            syllables, n, separator, capitalize, digits), reject)
+
+    def check_password_strength(self, password, charset=None):
+        """Check password strength, returning (strength, score).
+        
+        Use analyze_password for the entropy figure as well.
+        """
+        strength = password_strength.analyze(password, charset)
+        return strength.label, strength.score
+        
+    def analyze_password(self, password, charset=None):
+        """Rate a password, returning a Strength(label, score, bits).
+        
+        Pass the charset the password was generated from for an exact entropy figure.
+        """
+        return password_strength.analyze(password, charset)
+        
+    def add_password(self, password, description=""):
+        """Save a password unless the vault already has it; returns the new record or None.
+        
+        Raises ValueError if the vault could not be opened.
+        """
+        records = self.add_passwords([(password, description)])
+        return records[0] if records else None
+        
+    def add_passwords(self, entries):
+        """Save (password, description) pairs with a single write; returns the new records.
+        
+        Passwords the vault already has, or that appear earlier in `entries`,
+        are skipped. Raises ValueError if the vault could not be opened.
+        """
+        from password_vault import make_record
+        vault = self.vault
+        if vault is None:
+            raise ValueError(f"The vault could not be opened: {self.vault_error}")
+        index = self.dedupe_index
+        records = [make_record(password, description) for password, description in entries
+                   if index is None or index.add_password(password)]
+        try:
+            vault.append_many(records)
+        except BaseException:
+            # The index may now list passwords that never reached the vault
+            if index is not None:
+                index.reset()
+            raise
+        if index is not None:
+            index.sync(vault.path)
+        return records
+        
+    def clear_vault(self):
+        """Delete every saved password; returns how many there were."""
+        vault = self.vault
+        if vault is None:
+            return 0
+        count = len(vault)
+        if count:
+            vault.clear()
+            # An index that was not opened yet is rebuilt from the empty vault when it is
+            if self._dedupe_index is not None:
+                self._dedupe_index.reset()
+                self._dedupe_index.sync(vault.path)
+        return count
@@ -0,0 +1,227 @@
+"""
+Duplicate Detection
+Keyed-hash fingerprints of passwords with O(1) membership checks.
+
+Each password is reduced to a 64-bit fingerprint: a keyed BLAKE2b MAC
+under a per-vault secret key (a quarter of the cost of HMAC-SHA256, which
+matters for multi-million batches), so the index says nothing about the
+passwords to anyone without the key. Fingerprints live in an
+open-addressing hash table of 64-bit slots (linear probing, doubled when
+half full), which takes 8-16 bytes per password. A batch keeps its table
+in memory; a vault's table is memory-mapped from a file next to it and
+rebuilt automatically when the vault changed without it.
+
+Two different passwords share a fingerprint with probability 2**-64. The
+worst case is that a new password is treated as a duplicate and replaced;
+a real duplicate is never missed.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+
+INDEX_SUFFIX = '.dedupe'
+
+MAGIC = b'PWDEDUP1'
+# Magic, capacity, count, vault size, vault mtime (ns), key check, stored key
+HEADER = struct.Struct('<8sQQqqQ32s')
+
+MIN_CAPACITY = 1024
+KEY_SIZE = 32
+
+
+def fingerprint(key, password):
+    """The 64-bit keyed fingerprint of a password (never 0, which marks an empty slot)."""
+    digest = hashlib.blake2b(password.encode('utf-8'), key=key, digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+def capacity_for(count):
+    """The smallest table size that holds `count` fingerprints without growing."""
+    return max(MIN_CAPACITY, 1 << (2 * count).bit_length())
+
+
+class FingerprintSet:
+    """An in-memory open-addressing hash set of 64-bit fingerprints."""
+
+    def __init__(self, key, expected=0):
+        self.key = key
+        self.count = 0
+        # Sizing for the expected count up front avoids rehashing as the set fills
+        self._slots = self._allocate(capacity_for(expected))
+
+    def _allocate(self, capacity):
+        return memoryview(bytearray(8 * capacity)).cast('Q')
+
+    def _replace(self, slots):
+        self._slots = slots
+
+    def __len__(self):
+        return self.count
+
+    def _find(self, fp):
+        """Index of the slot holding `fp`, or of the empty slot where it would go."""
+        slots = self._slots
+        mask = len(slots) - 1
+        i = fp & mask
+        while True:
+            value = slots[i]
+            if value == fp or not value:
+                return i
+            i = (i + 1) & mask
+
+    def __contains__(self, fp):
+        return self._slots[self._find(fp)] == fp
+
+    def add(self, fp):
+        """Add a fingerprint; returns False if it was already present."""
+        i = self._find(fp)
+        if self._slots[i] == fp:
+            return False
+        if 2 * (self.count + 1) > len(self._slots):
+            self._grow()
+            i = self._find(fp)
+        self._slots[i] = fp
+        self.count += 1
+        return True
+
+    def _grow(self):
+        old = self._slots
+        new = self._allocate(2 * len(old))
+        mask = len(new) - 1
+        for fp in old:
+            if fp:
+                i = fp & mask
+                while new[i]:
+                    i = (i + 1) & mask
+                new[i] = fp
+        self._replace(new)
+
+    def contains_password(self, password):
+        return fingerprint(self.key, password) in self
+
+    def add_password(self, password):
+        """Add a password's fingerprint; returns False if it was already present."""
+        return self.add(fingerprint(self.key, password))
+
+
+def _vault_stat(vault_path):
+    try:
+        stat = os.stat(vault_path)
+    except OSError:
+        return 0, 0
+    return stat.st_size, stat.st_mtime_ns
+
+
+class DedupeIndex(FingerprintSet):
+    """Fingerprints of every password in a vault, memory-mapped from `path`.
+
+    The header records the vault's size and modification time as of the
+    last sync(); open_index rebuilds the index when they no longer match.
+    A vault without a key of its own gets a random one stored in the header.
+    """
+
+    def __init__(self, path, key=None):
+        self.path = path
+        self.key_is_stored = key is None
+        self._mm = None
+        header = self._read_header(key)
+        if header is None:
+            self.key = key or os.urandom(KEY_SIZE)
+            self.count = 0
+            self.vault_stat = (-1, -1)
+            self._create(path, MIN_CAPACITY)
+        else:
+            self.key, self.count, self.vault_stat = header
+        self._map()
+
+    def _read_header(self, key):
+        """(key, count, vault stat) from an existing index usable with `key`, else None."""
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read(HEADER.size)
+            magic, capacity, count, size, mtime, check, stored_key = HEADER.unpack(data)
+        except (OSError, struct.error):
+            return None
+        if magic != MAGIC or os.path.getsize(self.path) != HEADER.size + 8 * capacity:
+            return None
+        key = key or stored_key
+        if fingerprint(key, '') != check:
+            return None
+        return key, count, (size, mtime)
+
+    def _create(self, path, capacity):
+        with open(path, 'wb') as f:
+            f.truncate(HEADER.size + 8 * capacity)
+        self._write_header(path, capacity, 0, (-1, -1))
+
+    def _write_header(self, path, capacity, count, vault_stat):
+        stored_key = self.key if self.key_is_stored else bytes(KEY_SIZE)
+        with open(path, 'r+b') as f:
+            f.write(HEADER.pack(MAGIC, capacity, count, vault_stat[0], vault_stat[1],
+                                fingerprint(self.key, ''), stored_key))
+
+    def _map(self):
+        with open(self.path, 'r+b') as f:
+            self._mm = mmap.mmap(f.fileno(), 0)
+        self._slots = memoryview(self._mm)[HEADER.size:].cast('Q')
+
+    def _unmap(self):
+        if self._mm is not None:
+            self._slots.release()
+            self._mm.close()
+            self._mm = None
+
+    def _allocate(self, capacity):
+        tmp_path = self.path + '.tmp'
+        self._create(tmp_path, capacity)
+        with open(tmp_path, 'r+b') as f:
+            self._tmp_mm = mmap.mmap(f.fileno(), 0)
+        return memoryview(self._tmp_mm)[HEADER.size:].cast('Q')
+
+    def _replace(self, slots):
+        self._unmap()
+        self._tmp_mm.flush()
+        slots.release()
+        self._tmp_mm.close()
+        os.replace(self.path + '.tmp', self.path)
+        self._map()
+
+    def sync(self, vault_path):
+        """Record that the index now matches the vault at `vault_path`."""
+        self._mm.flush()
+        self.vault_stat = _vault_stat(vault_path)
+        self._write_header(self.path, len(self._slots), self.count, self.vault_stat)
+
+    def matches(self, vault_path):
+        return self.vault_stat == _vault_stat(vault_path)
+
+    def reset(self, capacity=MIN_CAPACITY):
+        """Empty the index."""
+        self._unmap()
+        self.count = 0
+        self.vault_stat = (-1, -1)
+        self._create(self.path, capacity)
+        self._map()
+
+    def rebuild(self, vault):
+        """Re-index every password in `vault`, in one streaming pass."""
+        self.reset(capacity_for(len(vault)))
+        for record in vault:
+            self.add_password(record['password'])
+        self.sync(vault.path)
+
+    def close(self):
+        self._unmap()
+
+
+def open_index(vault):
+    """Open the dedupe index next to `vault`, rebuilding it if the vault changed without it."""
+    # An encrypted vault's index is keyed from the vault key, so it is not stored
+    cipher = getattr(vault, 'cipher', None)
+    key = cipher.subkey(b'dedupe') if cipher is not None else None
+    index = DedupeIndex(vault.path + INDEX_SUFFIX, key)
+    if not index.matches(vault.path):
+        index.rebuild(vault)
+    return index
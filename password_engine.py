@@ -0,0 +1,331 @@
+"""
+Password Generation Engine
+Shared, cryptographically secure password generation used by the CLI and GUI.
+
+Random bytes are read from os.urandom in large blocks and mapped onto the
+character set with rejection sampling: a byte is only accepted when it falls
+below the largest multiple of the alphabet size, which keeps every character
+equally likely. The mapping and the rejection are both done by a single
+bytes.translate call, so no Python code runs per character.
+
+Character sets are compiled once into immutable Charset objects that carry
+the lookup table and rejection threshold, and compiled sets are memoized by
+their options so repeated calls never rebuild the alphabet.
+
+Small reads are served from a RandomPool: a buffer of OS random bytes with
+a spare that a background thread refills, so single passwords do not each
+cost a system call. Reads take no lock, and the pool starts small and only
+starts its thread once that first buffer is used up, so one-shot commands
+stay cheap. Every byte is handed out at most once.
+"""
+
+import io
+import os
+import threading
+import weakref
+from collections import deque, namedtuple
+from functools import lru_cache
+
+# Bytes requested from the OS per read when filling a batch
+BLOCK_SIZE = 64 * 1024
+
+# Passwords generated per task when a batch is split across processes
+PARALLEL_CHUNK_SIZE = 50000
+
+# Size of each of the random pool's two buffers
+POOL_SIZE = 256 * 1024
+# Size of the pool's first buffer, enough for a handful of passwords
+POOL_INITIAL_SIZE = 4 * 1024
+# Reads at least this large skip the pool and go straight to the OS
+POOL_BYPASS_SIZE = 16 * 1024
+
+# Spelled out rather than taken from `string`, whose import pulls in `re`
+UPPERCASE = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+LOWERCASE = "abcdefghijklmnopqrstuvwxyz"
+NUMBERS = "0123456789"
+SYMBOLS = "!@#$%^&*()_+-=[]{}|;:,.<>?"
+SIMILAR_CHARS = "l1IO0"
+AMBIGUOUS_CHARS = "{}[]()/\\|`~"
+
+
+class Charset(namedtuple('Charset', 'chars table rejected limit')):
+    """An immutable, compiled alphabet ready for generation.
+
+    `table` maps every byte value to a character of the alphabet and
+    `rejected` lists the byte values at or above `limit`, which are dropped
+    so that every character is equally likely.
+    """
+    __slots__ = ()
+
+    def __len__(self):
+        return len(self.chars)
+
+    def __str__(self):
+        return self.chars
+
+    def generate(self, length):
+        """Generate a single password from this charset."""
+        return generate_passwords(self, length, 1)[0]
+
+    def generate_batch(self, length, count):
+        """Generate `count` passwords from this charset in one pass."""
+        return generate_passwords(self, length, count)
+
+
+@lru_cache(maxsize=None)
+def charset_from_chars(chars):
+    """Compile a string of ASCII characters into a Charset."""
+    # Duplicates would make some characters more likely than others
+    chars = ''.join(dict.fromkeys(chars))
+    if not chars:
+        raise ValueError("At least one character type must be selected!")
+    if len(chars) > 256:
+        raise ValueError("Character set cannot contain more than 256 characters!")
+    try:
+        encoded = chars.encode('ascii')
+    except UnicodeEncodeError:
+        raise ValueError("Character set must contain only ASCII characters!")
+
+    size = len(encoded)
+    limit = 256 - (256 % size)
+    table = bytes(encoded[b % size] for b in range(256))
+    rejected = bytes(range(limit, 256))
+    return Charset(chars, table, rejected, limit)
+
+
+@lru_cache(maxsize=256)
+def compile_charset(uppercase=True, lowercase=True, numbers=True, symbols=True,
+                    exclude_similar=False, exclude_ambiguous=False,
+                    include='', exclude=''):
+    """Compile generation options into a memoized Charset."""
+    chars = ""
+
+    if uppercase:
+        chars += UPPERCASE
+    if lowercase:
+        chars += LOWERCASE
+    if numbers:
+        chars += NUMBERS
+    if symbols:
+        chars += SYMBOLS
+    chars += include
+
+    if not chars:
+        raise ValueError("At least one character type must be selected!")
+
+    removed = exclude
+    if exclude_similar:
+        removed += SIMILAR_CHARS
+    if exclude_ambiguous:
+        removed += AMBIGUOUS_CHARS
+    if removed:
+        chars = ''.join(c for c in chars if c not in removed)
+
+    if not chars:
+        raise ValueError("All characters were excluded!")
+
+    return charset_from_chars(chars)
+
+
+# Digits only, for the digits appended to passphrases and pronounceable passwords
+DIGITS = compile_charset(uppercase=False, lowercase=False, symbols=False)
+
+
+class RandomPool:
+    """A double-buffered pool of OS random bytes with a background refill thread.
+
+    The active buffer is an io.BytesIO whose read() hands out the next n
+    bytes in a single C call, so reads are atomic under the GIL and take no
+    lock. When the active buffer runs out it is swapped for the spare, which
+    a daemon thread refills in the background; if the spare is not ready yet
+    the pool refills inline rather than waiting, so a read never blocks on
+    the thread. The first buffer is small and the thread is only started at
+    the first swap, so a process that needs a few bytes pays for one small
+    read and no thread. Bytes are never handed out twice, and forked child
+    processes discard the parent's buffers (see _after_fork_in_child).
+    """
+
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._reset()
+        _pools.add(self)
+
+    def _reset(self):
+        self._active = io.BytesIO(os.urandom(min(POOL_INITIAL_SIZE, self.size)))
+        self._spare = None
+        self._refill = None
+
+    def _refill_loop(self, refill):
+        while True:
+            refill.wait()
+            spare = io.BytesIO(os.urandom(self.size))
+            with self._lock:
+                if refill is not self._refill:
+                    return  # the pool was reset after a fork
+                self._spare = spare
+                refill.clear()
+
+    def _swap(self):
+        # Called with the lock held
+        if self._spare is not None:
+            self._active, self._spare = self._spare, None
+        else:
+            self._active = io.BytesIO(os.urandom(self.size))
+        if self._refill is None:
+            self._refill = threading.Event()
+            threading.Thread(target=self._refill_loop, args=(self._refill,),
+                             name='RandomPool-refill', daemon=True).start()
+        self._refill.set()
+
+    def warm(self):
+        """Fill a full-size buffer and start the refill thread now, ahead of the first reads."""
+        with self._lock:
+            if self._refill is None:
+                self._swap()
+
+    def read(self, n):
+        """Return n random bytes."""
+        if n > self.size:
+            return os.urandom(n)
+        while True:
+            active = self._active
+            chunk = active.read(n)
+            if len(chunk) == n:
+                return chunk
+            # The tail of an exhausted buffer is dropped rather than reused
+            with self._lock:
+                if self._active is active:
+                    self._swap()
+
+    def take(self, n):
+        """Return n random bytes as a read-only memoryview."""
+        return memoryview(self.read(n))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+# Every pool, so that a forked child can reset them all
+_pools = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    # A lock held by another thread at fork time would never be released, and
+    # bytes inherited from the parent must not be handed out a second time
+    global _pool_lock
+    _pool_lock = threading.Lock()
+    for pool in list(_pools):
+        pool._lock = threading.Lock()
+        pool._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_pool():
+    """Return the shared RandomPool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = RandomPool()
+    return _pool
+
+
+def random_bytes(n):
+    """Return n cryptographically secure random bytes, using the shared pool for small reads."""
+    if n >= POOL_BYPASS_SIZE:
+        return os.urandom(n)
+    return (_pool or get_pool()).read(n)
+
+
+def random_chars(charset, n):
+    """Return exactly n uniformly distributed characters of `charset` as ASCII bytes."""
+    table, rejected = charset.table, charset.rejected
+    parts = []
+    have = 0
+    # Over-request slightly so that most batches need a single read
+    accept_ratio = charset.limit / 256
+    while have < n:
+        want = int((n - have) / accept_ratio) + 16
+        chunk = random_bytes(min(want, BLOCK_SIZE)).translate(table, rejected)
+        parts.append(chunk)
+        have += len(chunk)
+    return b''.join(parts)[:n]
+
+
+def random_indices(n, k):
+    """Return k uniformly distributed integers in range(n) from the secure random source."""
+    limit = (1 << 32) - ((1 << 32) % n)
+    indices = []
+    while len(indices) < k:
+        values = memoryview(random_bytes(4 * (k - len(indices) + 4))).cast('I')
+        indices.extend(v % n for v in values if v < limit)
+    return indices[:k]
+
+
+def generate_passwords(charset, length, count):
+    """Generate `count` passwords of `length` characters in one pass.
+
+    `charset` is a compiled Charset or a plain string of characters.
+    """
+    if length < 1:
+        raise ValueError("Password length must be at least 1!")
+    if count < 0:
+        raise ValueError("Count cannot be negative!")
+
+    if not isinstance(charset, Charset):
+        charset = charset_from_chars(charset)
+    data = random_chars(charset, length * count).decode('ascii')
+    return [data[i:i + length] for i in range(0, length * count, length)]
+
+
+def generate_password(charset, length):
+    """Generate a single password of `length` characters from `charset`."""
+    return generate_passwords(charset, length, 1)[0]
+
+
+def _generate_chunk(chars, length, count):
+    """Worker entry point: generate one shard of a parallel batch."""
+    # Each process draws from its own OS random source, so no seeding is needed
+    return generate_passwords(chars, length, count)
+
+
+def generate_parallel_chunks(charset, length, count, workers=None,
+                             chunk_size=PARALLEL_CHUNK_SIZE):
+    """Yield lists of passwords, totalling `count`, generated across a process pool.
+
+    Shards are yielded in submission order and only a few are kept in
+    flight per worker, so memory stays bounded for any count.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    if length < 1:
+        raise ValueError("Password length must be at least 1!")
+    if count < 0:
+        raise ValueError("Count cannot be negative!")
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be at least 1!")
+    if isinstance(charset, Charset):
+        charset = charset.chars
+    # Validate in the parent so errors surface before any worker starts
+    charset_from_chars(charset)
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        remaining = count
+        while remaining or pending:
+            while remaining and len(pending) < workers * 2:
+                shard = min(remaining, chunk_size)
+                pending.append(executor.submit(_generate_chunk, charset, length, shard))
+                remaining -= shard
+            yield pending.popleft().result()
+
+
+def generate_parallel(charset, length, count, workers=None,
+                      chunk_size=PARALLEL_CHUNK_SIZE):
+    """Yield `count` passwords one at a time, generated across a process pool."""
+    for chunk in generate_parallel_chunks(charset, length, count, workers, chunk_size):
+        yield from chunk
@@ -1,11 +1,79 @@
+import queue
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-import random
-import string
+from tkinter import ttk, messagebox, simpledialog
 import pyperclip
-import json
-import os
-from datetime import datetime
+
+import password_passphrase
+import password_strength
+from password_core import PasswordCore
+from password_vault import RecordView, is_encrypted
+
+STRENGTH_COLORS = {
+    "Weak": "#e74c3c",
+    "Fair": "#f39c12",
+    "Good": "#f1c40f",
+    "Strong": "#27ae60",
+}
+
+# How often the main loop checks for finished background jobs
+POLL_INTERVAL_MS = 30
+
+# Saved-password list: pixel height of a row, and the pause after typing before filtering
+ROW_HEIGHT = 22
+FILTER_DELAY_MS = 250
+SAVED_COLUMNS = (
+    ('description', "Description", 180),
+    ('password', "Password", 180),
+    ('length', "Length", 60),
+    ('timestamp', "Created", 140),
+)
+
+class BackgroundWorker:
+    """Runs jobs one at a time on a daemon thread and hands results back to Tk.
+    
+    Tk widgets may only be touched from the main thread, so finished jobs are
+    queued and their callbacks run from window.after polling, which is only
+    active while jobs are pending. Jobs run in submission order, so vault
+    writes never overlap.
+    """
+    
+    def __init__(self, window, poll_interval=POLL_INTERVAL_MS):
+        self.window = window
+        self.poll_interval = poll_interval
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.pending = 0
+        threading.Thread(target=self._run, name='gui-worker', daemon=True).start()
+        
+    def submit(self, job, on_done=None, on_error=None):
+        """Run job() in the background, then on_done(result) or on_error(exception) on the main thread."""
+        self.pending += 1
+        self.jobs.put((job, on_done, on_error))
+        if self.pending == 1:
+            self.window.after(self.poll_interval, self._poll)
+            
+    def _run(self):
+        while True:
+            job, on_done, on_error = self.jobs.get()
+            try:
+                self.results.put((on_done, job(), False))
+            except Exception as e:
+                self.results.put((on_error, e, True))
+                
+    def _poll(self):
+        while True:
+            try:
+                callback, value, failed = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            if callback is not None:
+                callback(value)
+            elif failed:
+                print(f"Background task failed: {value}")
+        if self.pending:
+            self.window.after(self.poll_interval, self._poll)
 
 class PasswordGenerator:
     def __init__(self):
@@ -20,6 +88,21 @@ class PasswordGenerator:
         style.configure('TButton', padding=10, font=('Arial', 10))
         style.configure('TLabel', background='#2c3e50', foreground='white', font=('Arial', 10))
         style.configure('TCheckbutton', background='#2c3e50', foreground='white')
+        style.configure('Treeview', background='#34495e', fieldbackground='#34495e',
+                        foreground='#ecf0f1', rowheight=ROW_HEIGHT, font=('Courier', 10))
+        
+        # Generation, scoring and the vault; breached_passwords.bloom is used when present.
+        # Vaults from older versions (saved_passwords.json) are migrated on first use
+        self.core = PasswordCore('saved_passwords.jsonl', legacy_file='saved_passwords.json')
+        
+        # Generation and vault I/O run here so the window never freezes
+        self.worker = BackgroundWorker(self.window)
+        
+        # Saved passwords, filtered and sorted; only the rows in view are drawn
+        self.saved_view = RecordView()
+        self.saved_offset = 0
+        self.saved_visible_rows = 8
+        self.filter_job = None
         
         self.setup_ui()
         self.load_saved_passwords()
@@ -130,6 +213,32 @@ class PasswordGenerator:
             font=('Arial', 10)
         ).pack(anchor='w', padx=10, pady=2)
         
+        # Passphrase options, only offered when there is a wordlist to draw from
+        self.passphrase_var = tk.BooleanVar(value=False)
+        self.words_var = tk.StringVar(value="6")
+        if password_passphrase.default_wordlist() is not None:
+            passphrase_frame = tk.Frame(options_frame, bg='#2c3e50')
+            passphrase_frame.pack(anchor='w', padx=10, pady=2, fill='x')
+            
+            tk.Checkbutton(
+                passphrase_frame, 
+                text=f"Passphrase from {password_passphrase.DEFAULT_WORDLIST_FILE} (words):", 
+                variable=self.passphrase_var,
+                bg='#2c3e50',
+                fg='white',
+                selectcolor='#34495e',
+                font=('Arial', 10)
+            ).pack(side='left')
+            
+            tk.Spinbox(
+                passphrase_frame, 
+                from_=3, 
+                to=20, 
+                textvariable=self.words_var,
+                width=5,
+                font=('Arial', 10)
+            ).pack(side='left', padx=5)
+        
         # Buttons frame
         buttons_frame = tk.Frame(self.window, bg='#2c3e50')
         buttons_frame.pack(pady=20)
@@ -221,16 +330,43 @@ class PasswordGenerator:
         )
         saved_frame.pack(pady=10, padx=20, fill='both', expand=True)
         
-        # Text area for saved passwords
-        self.saved_text = scrolledtext.ScrolledText(
-            saved_frame,
-            height=8,
-            bg='#34495e',
-            fg='#ecf0f1',
-            font=('Courier', 10),
-            relief='flat'
+        # Filters for the saved passwords list
+        filter_frame = tk.Frame(saved_frame, bg='#2c3e50')
+        filter_frame.pack(padx=10, pady=(10, 0), fill='x')
+        self.search_var = tk.StringVar()
+        self.since_var = tk.StringVar()
+        self.min_length_var = tk.StringVar()
+        for label, var, width in (("Search:", self.search_var, 18),
+                                  ("Since:", self.since_var, 11),
+                                  ("Min length:", self.min_length_var, 4)):
+            tk.Label(filter_frame, text=label, bg='#2c3e50', fg='white', font=('Arial', 10)).pack(side='left')
+            tk.Entry(filter_frame, textvariable=var, width=width).pack(side='left', padx=(2, 8))
+            var.trace_add('write', lambda *_: self.schedule_filter())
+        self.saved_count_label = tk.Label(filter_frame, text="", bg='#2c3e50', fg='white', font=('Arial', 9))
+        self.saved_count_label.pack(side='right')
+        
+        # Saved passwords list. The tree only ever holds the rows in view; the
+        # scrollbar is driven by hand over the whole filtered list.
+        list_frame = tk.Frame(saved_frame, bg='#2c3e50')
+        list_frame.pack(pady=10, padx=10, fill='both', expand=True)
+        self.saved_tree = ttk.Treeview(
+            list_frame,
+            columns=[name for name, _, _ in SAVED_COLUMNS],
+            show='headings',
+            height=self.saved_visible_rows,
+            selectmode='browse'
         )
-        self.saved_text.pack(pady=10, padx=10, fill='both', expand=True)
+        for name, heading, width in SAVED_COLUMNS:
+            self.saved_tree.heading(name, text=heading,
+                                    command=lambda name=name: self.sort_saved_passwords(name))
+            self.saved_tree.column(name, width=width, stretch=name in ('description', 'password'))
+        self.saved_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.scroll_saved_passwords)
+        self.saved_scrollbar.pack(side='right', fill='y')
+        self.saved_tree.pack(side='left', fill='both', expand=True)
+        self.saved_tree.bind('<Configure>', self.on_saved_list_resize)
+        self.saved_tree.bind('<MouseWheel>', lambda e: self.scroll_saved_passwords('scroll', -e.delta // 120, 'units'))
+        self.saved_tree.bind('<Button-4>', lambda e: self.scroll_saved_passwords('scroll', -3, 'units'))
+        self.saved_tree.bind('<Button-5>', lambda e: self.scroll_saved_passwords('scroll', 3, 'units'))
         
         # Clear saved passwords button
         clear_btn = tk.Button(
@@ -248,80 +384,82 @@ class PasswordGenerator:
         clear_btn.pack(pady=5)
         
     def generate_password(self):
+        if self.passphrase_var.get():
+            self.generate_passphrase()
+            return
+            
         try:
             length = int(self.length_var.get())
-            if length < 4:
-                messagebox.showerror("Error", "Password length must be at least 4 characters!")
-                return
-                
-            # Build character set based on options
-            chars = ""
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid password length!")
+            return
+        if length < 4:
+            messagebox.showerror("Error", "Password length must be at least 4 characters!")
+            return
             
-            if self.uppercase_var.get():
-                chars += string.ascii_uppercase
-            if self.lowercase_var.get():
-                chars += string.ascii_lowercase
-            if self.numbers_var.get():
-                chars += string.digits
-            if self.symbols_var.get():
-                chars += "!@#$%^&*()_+-=[]{}|;:,.<>?"
-                
-            if not chars:
-                messagebox.showerror("Error", "Please select at least one character type!")
-                return
-                
-            # Remove similar characters if requested
-            if self.similar_var.get():
-                similar_chars = "l1IO0"
-                chars = ''.join(c for c in chars if c not in similar_chars)
-                
-            # Remove ambiguous characters if requested
-            if self.ambiguous_var.get():
-                ambiguous_chars = "{}[]()/\\|`~"
-                chars = ''.join(c for c in chars if c not in ambiguous_chars)
-                
-            # Generate password
-            password = ''.join(random.choice(chars) for _ in range(length))
-            self.password_var.set(password)
+        if not (self.uppercase_var.get() or self.lowercase_var.get() or
+                self.numbers_var.get() or self.symbols_var.get()):
+            messagebox.showerror("Error", "Please select at least one character type!")
+            return
+            
+        # Options are read here; Tk variables must not be touched from the worker
+        options = dict(
+            uppercase=self.uppercase_var.get(),
+            lowercase=self.lowercase_var.get(),
+            numbers=self.numbers_var.get(),
+            symbols=self.symbols_var.get(),
+            exclude_similar=self.similar_var.get(),
+            exclude_ambiguous=self.ambiguous_var.get()
+        )
+        
+        def job():
+            # Compiled character sets are cached, so this is cheap on repeat clicks
+            charset = self.core.build_charset(**options)
+            # Passwords that appear in the breach list are replaced
+            password = next(self.core.generate_many(1, length, reject=self.core.is_breached, **options))
+            return self.rate_password(password, charset)
             
-            # Update strength indicator
-            self.update_strength_indicator(password)
+        self.worker.submit(job, self.show_password, lambda e: messagebox.showerror(
+            "Error", f"Failed to generate password: {str(e)}"))
             
+    def generate_passphrase(self):
+        try:
+            words = int(self.words_var.get())
         except ValueError:
-            messagebox.showerror("Error", "Please enter a valid password length!")
+            messagebox.showerror("Error", "Please enter a valid number of words!")
+            return
             
-    def update_strength_indicator(self, password):
-        score = 0
-        feedback = []
-        
-        if len(password) >= 8:
-            score += 1
-        if len(password) >= 12:
-            score += 1
-        if any(c.isupper() for c in password):
-            score += 1
-        if any(c.islower() for c in password):
-            score += 1
-        if any(c.isdigit() for c in password):
-            score += 1
-        if any(c in "!@#$%^&*()_+-=[]{}|;:,.<>?" for c in password):
-            score += 1
+        def job():
+            passphrase = self.core.generate_passphrase(words, reject=self.core.is_breached)
+            return self.rate_password(passphrase, bits=self.core.passphrase_entropy(words))
             
-        if score <= 2:
-            strength = "Weak"
-            color = "#e74c3c"
-        elif score <= 4:
-            strength = "Fair"
-            color = "#f39c12"
-        elif score <= 5:
-            strength = "Good"
-            color = "#f1c40f"
+        self.worker.submit(job, self.show_password, lambda e: messagebox.showerror(
+            "Error", f"Failed to generate passphrase: {str(e)}"))
+        
+    def rate_password(self, password, charset=None, bits=None):
+        """Return (password, strength, bits, breached); safe to call from the worker."""
+        strength, score, estimated_bits = self.core.analyze_password(password, charset)
+        if bits is None:
+            bits = estimated_bits
         else:
-            strength = "Strong"
-            color = "#27ae60"
+            strength = password_strength.rate_entropy(bits)
+        return password, strength, bits, self.core.is_breached(password)
+        
+    def show_password(self, rated):
+        password, strength, bits, breached = rated
+        self.password_var.set(password)
+        self.update_strength_indicator(strength, bits, breached)
+        
+    def update_strength_indicator(self, strength, bits, breached=False):
+        color = STRENGTH_COLORS[strength]
+        text = f"Password Strength: {strength} ({bits:.0f} bits)"
+        
+        if breached:
+            text = "⚠️ Found in breached password list!"
+            color = STRENGTH_COLORS["Weak"]
             
         self.strength_label.config(
-            text=f"Password Strength: {strength}",
+            text=text,
             fg=color
         )
         
@@ -357,21 +495,18 @@ class PasswordGenerator:
         desc_entry.pack(pady=5)
         
         def save():
-            description = desc_var.get().strip() or "No description"
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            password_data = {
-                "password": password,
-                "description": description,
-                "timestamp": timestamp,
-                "length": len(password)
-            }
-            
-            self.saved_passwords.append(password_data)
-            self.save_passwords_to_file()
-            self.update_saved_passwords_display()
+            description = desc_var.get().strip()
             dialog.destroy()
-            messagebox.showinfo("Success", "Password saved successfully!")
+            
+            def saved(password_data):
+                if password_data is None:
+                    messagebox.showwarning("Warning", "This password is already saved!")
+                    return
+                self.append_saved_password_row(password_data)
+                messagebox.showinfo("Success", "Password saved successfully!")
+                
+            self.worker.submit(lambda: self.core.add_password(password, description), saved,
+                               lambda e: messagebox.showerror("Error", f"Failed to save passwords: {str(e)}"))
             
         save_btn = tk.Button(
             dialog,
@@ -383,43 +518,114 @@ class PasswordGenerator:
         )
         save_btn.pack(pady=10)
         
+    @property
+    def saved_passwords(self):
+        return self.saved_view.records
+        
     def load_saved_passwords(self):
-        self.saved_passwords = []
-        try:
-            if os.path.exists('saved_passwords.json'):
-                with open('saved_passwords.json', 'r') as f:
-                    self.saved_passwords = json.load(f)
-        except Exception as e:
+        # Encrypted vaults need their master password before anything can be read
+        if is_encrypted(self.core.saved_passwords_file):
+            self.core.master_password = simpledialog.askstring(
+                "Master Password", "Enter the vault master password:", show='*', parent=self.window)
+                
+        def job():
+            self.core.load_saved_passwords()
+            if self.core.vault is None:
+                raise self.core.vault_error
+            # Opened (or rebuilt) now so that saving never waits for it
+            self.core.dedupe_index
+            return list(self.core.vault)
+            
+        def loaded(records):
+            self.update_saved_passwords_display(records)
+            
+        def failed(e):
             print(f"Error loading saved passwords: {e}")
+            self.update_saved_passwords_display([])
             
-        self.update_saved_passwords_display()
-        
-    def save_passwords_to_file(self):
-        try:
-            with open('saved_passwords.json', 'w') as f:
-                json.dump(self.saved_passwords, f, indent=2)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save passwords: {str(e)}")
+        self.saved_count_label.config(text="Loading...")
+        self.worker.submit(job, loaded, failed)
+        
+    def update_saved_passwords_display(self, records=None):
+        """Redraw the saved passwords list, optionally replacing its records."""
+        if records is not None:
+            self.saved_view.reset(records)
+        self.render_saved_passwords()
+        
+    def append_saved_password_row(self, pwd_data):
+        """Add one newly saved entry; only the rows in view are redrawn."""
+        self.saved_view.append(pwd_data)
+        self.render_saved_passwords()
+        
+    def render_saved_passwords(self):
+        """Draw the rows currently in view and update the scrollbar."""
+        total = len(self.saved_view)
+        rows = self.saved_visible_rows
+        self.saved_offset = max(0, min(self.saved_offset, total - rows))
+        self.saved_tree.delete(*self.saved_tree.get_children())
+        for pwd_data in self.saved_view.window(self.saved_offset, rows):
+            self.saved_tree.insert('', tk.END, values=[pwd_data[name] for name, _, _ in SAVED_COLUMNS])
+        if total:
+            self.saved_scrollbar.set(self.saved_offset / total, min(1.0, (self.saved_offset + rows) / total))
+        else:
+            self.saved_scrollbar.set(0.0, 1.0)
+        if len(self.saved_passwords):
+            self.saved_count_label.config(text=f"{total:,} of {len(self.saved_passwords):,}")
+        else:
+            self.saved_count_label.config(text="No saved passwords yet.")
             
-    def update_saved_passwords_display(self):
-        self.saved_text.delete(1.0, tk.END)
-        
-        if not self.saved_passwords:
-            self.saved_text.insert(tk.END, "No saved passwords yet.\n")
-            return
+    def scroll_saved_passwords(self, action, amount, unit=None):
+        """Scrollbar and mouse wheel handler: ('moveto', fraction) or ('scroll', n, 'units'|'pages')."""
+        if action == 'moveto':
+            self.saved_offset = int(float(amount) * len(self.saved_view))
+        else:
+            step = self.saved_visible_rows if unit == 'pages' else 1
+            self.saved_offset += int(amount) * step
+        self.render_saved_passwords()
+        
+    def on_saved_list_resize(self, event):
+        rows = max(1, (event.height - ROW_HEIGHT) // ROW_HEIGHT)
+        if rows != self.saved_visible_rows:
+            self.saved_visible_rows = rows
+            self.render_saved_passwords()
             
-        for i, pwd_data in enumerate(self.saved_passwords, 1):
-            self.saved_text.insert(tk.END, f"{i}. {pwd_data['description']}\n")
-            self.saved_text.insert(tk.END, f"   Password: {pwd_data['password']}\n")
-            self.saved_text.insert(tk.END, f"   Length: {pwd_data['length']} | Created: {pwd_data['timestamp']}\n")
-            self.saved_text.insert(tk.END, "-" * 50 + "\n")
+    def sort_saved_passwords(self, column):
+        """Sort by a column; clicking the same column again reverses the order."""
+        if column == 'password':
+            return
+        reverse = self.saved_view.sort_key == column and not self.saved_view.reverse
+        self.saved_view.sort_by(column, reverse)
+        for name, heading, _ in SAVED_COLUMNS:
+            arrow = (" ▼" if reverse else " ▲") if name == column else ""
+            self.saved_tree.heading(name, text=heading + arrow)
+        self.saved_offset = 0
+        self.render_saved_passwords()
+        
+    def schedule_filter(self):
+        """Filter once typing pauses, rather than on every keystroke."""
+        if self.filter_job is not None:
+            self.window.after_cancel(self.filter_job)
+        self.filter_job = self.window.after(FILTER_DELAY_MS, self.apply_saved_filter)
+        
+    def apply_saved_filter(self):
+        self.filter_job = None
+        min_length = self.min_length_var.get().strip()
+        self.saved_view.set_filter(
+            search=self.search_var.get().strip() or None,
+            since=self.since_var.get().strip() or None,
+            min_length=int(min_length) if min_length.isdigit() else None
+        )
+        self.saved_offset = 0
+        self.render_saved_passwords()
             
     def clear_saved_passwords(self):
         if messagebox.askyesno("Confirm", "Are you sure you want to clear all saved passwords?"):
-            self.saved_passwords = []
-            self.save_passwords_to_file()
-            self.update_saved_passwords_display()
-            messagebox.showinfo("Success", "All saved passwords cleared!")
+            def cleared(_):
+                self.update_saved_passwords_display([])
+                messagebox.showinfo("Success", "All saved passwords cleared!")
+                
+            self.worker.submit(self.core.clear_vault, cleared, lambda e: messagebox.showerror(
+                "Error", f"Failed to save passwords: {str(e)}"))
             
     def run(self):
         self.window.mainloop()
@@ -0,0 +1,180 @@
+"""
+Passphrase Generation
+Diceware-style passphrases drawn from a local wordlist.
+
+A wordlist file (one word per line, or EFF/diceware "11111<TAB>word"
+lines) is compiled once into a binary index next to it: a table of word
+offsets followed by the words themselves. The index is memory-mapped, so
+startup does not parse the wordlist and drawing a word is two offset reads
+and a slice. The index is rebuilt automatically when the wordlist changes.
+
+Word choices use the engine's secure random source with rejection
+sampling, like character passwords, so every word is equally likely.
+"""
+
+import math
+import mmap
+import os
+import struct
+from functools import lru_cache
+
+import password_engine
+
+# No wordlist is shipped; this one is used if it is in the working directory or next to this module
+DEFAULT_WORDLIST_FILE = 'wordlist.txt'
+
+MAGIC = b'PWWORDS1'
+# Magic, word count, source size, source mtime (ns)
+HEADER = struct.Struct('<8sIQQ')
+OFFSET = struct.Struct('<I')
+
+# Above this many words per call, the whole list is decoded once and reused
+BULK_THRESHOLD = 1000
+
+
+def _read_words(wordlist_path):
+    """Yield the words of a wordlist file, skipping blanks, comments and dice numbers."""
+    with open(wordlist_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            yield line.split()[-1]
+
+
+def compile_wordlist(wordlist_path, index_path=None):
+    """Compile a wordlist into its binary index file and return the index path."""
+    index_path = index_path or wordlist_path + '.idx'
+    # Duplicate words would make some words more likely than others
+    words = [word.encode('utf-8') for word in dict.fromkeys(_read_words(wordlist_path))]
+    if len(words) < 2:
+        raise ValueError("Wordlist must contain at least two distinct words!")
+
+    stat = os.stat(wordlist_path)
+    offsets = [0]
+    for word in words:
+        offsets.append(offsets[-1] + len(word))
+
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(words), stat.st_size, stat.st_mtime_ns))
+        f.write(struct.pack(f'<{len(offsets)}I', *offsets))
+        f.write(b''.join(words))
+    os.replace(tmp_path, index_path)
+    return index_path
+
+
+class Wordlist:
+    """A memory-mapped, compiled wordlist with O(1) word lookup."""
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        with open(index_path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.source_size, self.source_mtime = HEADER.unpack_from(self._mm)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{index_path} is not a compiled wordlist!")
+        self._data_start = HEADER.size + (self.count + 1) * OFFSET.size
+        self._words = None
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError("wordlist index out of range")
+        start, end = struct.unpack_from('<II', self._mm, HEADER.size + index * OFFSET.size)
+        return self._mm[self._data_start + start:self._data_start + end].decode('utf-8')
+
+    @property
+    def bits_per_word(self):
+        return math.log2(self.count)
+
+    def words(self):
+        """Decode every word at once, for bulk generation; cached after the first call."""
+        if self._words is None:
+            offsets = struct.unpack_from(f'<{self.count + 1}I', self._mm, HEADER.size)
+            data = self._mm[self._data_start:self._data_start + offsets[-1]]
+            self._words = [data[start:end].decode('utf-8')
+                           for start, end in zip(offsets, offsets[1:])]
+        return self._words
+
+    def random_words(self, k):
+        """Return k uniformly chosen words."""
+        if k > BULK_THRESHOLD:
+            words = self.words()
+            return [words[i] for i in password_engine.random_indices(self.count, k)]
+        return [self[i] for i in password_engine.random_indices(self.count, k)]
+
+    def close(self):
+        self._mm.close()
+
+
+def default_wordlist():
+    """The default wordlist file to use, or None if there is none."""
+    for directory in ('', os.path.dirname(os.path.abspath(__file__))):
+        path = os.path.join(directory, DEFAULT_WORDLIST_FILE)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+@lru_cache(maxsize=None)
+def open_wordlist(wordlist_path=None):
+    """Open the compiled index for a wordlist (default: default_wordlist()), (re)building it if it is missing or stale."""
+    wordlist_path = wordlist_path or default_wordlist()
+    if wordlist_path is None:
+        raise ValueError(f"No wordlist given and no {DEFAULT_WORDLIST_FILE} found; "
+                         "use a wordlist file such as the EFF large wordlist!")
+    if not os.path.exists(wordlist_path):
+        raise ValueError(f"Wordlist not found: {wordlist_path}")
+    index_path = wordlist_path + '.idx'
+    stat = os.stat(wordlist_path)
+    if os.path.exists(index_path):
+        try:
+            wordlist = Wordlist(index_path)
+        except (ValueError, struct.error):
+            wordlist = None
+        if (wordlist is not None and wordlist.source_size == stat.st_size
+                and wordlist.source_mtime == stat.st_mtime_ns):
+            return wordlist
+        if wordlist is not None:
+            wordlist.close()
+    return Wordlist(compile_wordlist(wordlist_path, index_path))
+
+
+def passphrase_entropy(wordlist, words, digits=0):
+    """Exact entropy in bits of passphrases generated with these settings."""
+    bits = words * wordlist.bits_per_word
+    if digits:
+        # The digits themselves, plus which word they were attached to
+        bits += digits * math.log2(10) + math.log2(words)
+    return bits
+
+
+def generate_passphrases(wordlist, words, count, separator='-', capitalize=False, digits=0):
+    """Generate `count` passphrases of `words` words each.
+
+    With `capitalize` every word starts with a capital letter, and `digits`
+    random digits are appended to one randomly chosen word.
+    """
+    if words < 1:
+        raise ValueError("Passphrase must have at least one word!")
+    if digits < 0:
+        raise ValueError("Digits cannot be negative!")
+
+    chosen = wordlist.random_words(words * count)
+    if capitalize:
+        chosen = [word.capitalize() for word in chosen]
+    if digits:
+        positions = password_engine.random_indices(words, count)
+        numbers = password_engine.DIGITS.generate_batch(digits, count)
+        for n, (position, number) in enumerate(zip(positions, numbers)):
+            chosen[n * words + position] += number
+    return [separator.join(chosen[i:i + words]) for i in range(0, words * count, words)]
+
+
+def generate_passphrase(wordlist, words, separator='-', capitalize=False, digits=0):
+    """Generate a single passphrase."""
+    return generate_passphrases(wordlist, words, 1, separator, capitalize, digits)[0]
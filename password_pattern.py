@@ -0,0 +1,175 @@
+"""
+Pattern and Pronounceable Passwords
+Template-driven passwords (e.g. "Cvcc-9999-Cvcc") and pronounceable ones from syllable transitions.
+
+A template is compiled once into a buffer of its literal characters and,
+for each character class it uses, the positions that class fills. A batch
+of N passwords starts as N copies of the literal buffer; every position is
+then filled for all N passwords at once by a strided slice assignment from
+the engine's rejection-sampled random bytes, so no Python code runs per
+character. Every position is uniform and independent, so the entropy of a
+template is exactly the sum of log2(class size) over its positions.
+
+Pronounceable passwords are walks through a syllable Markov chain. The
+transition table is built once into flat arrays: `successors[state * width
++ i]` is the i-th syllable allowed after a syllable ending in `state` (its
+final consonants), and generating a syllable is one table lookup. Every
+state has the same number of successors and a transition is only allowed
+when the consonants around the syllable boundary can be split just one
+way, so distinct walks always give distinct passwords and the entropy
+figure is exact.
+"""
+
+import math
+from array import array
+from collections import namedtuple
+from functools import lru_cache
+
+import password_engine
+
+VOWELS = "aeiou"
+CONSONANTS = "bcdfghjklmnpqrstvwxyz"
+
+# Template characters and the characters they stand for; anything else is literal
+TEMPLATE_CLASSES = {
+    'C': CONSONANTS.upper(),
+    'c': CONSONANTS,
+    'V': VOWELS.upper(),
+    'v': VOWELS,
+    'A': password_engine.UPPERCASE,
+    'a': password_engine.LOWERCASE,
+    '9': password_engine.NUMBERS,
+    '#': password_engine.SYMBOLS,
+    'x': password_engine.LOWERCASE + password_engine.UPPERCASE + password_engine.NUMBERS,
+}
+# Put before a template character to use it literally
+ESCAPE = '\\'
+
+# Syllables are onset + nucleus + coda
+ONSETS = ('b', 'c', 'd', 'f', 'g', 'h', 'j', 'k', 'l', 'm', 'n', 'p', 'r', 's', 't', 'v',
+          'w', 'z', 'bl', 'br', 'ch', 'cl', 'cr', 'dr', 'fl', 'fr', 'gl', 'gr', 'pl', 'pr',
+          'sh', 'sl', 'sp', 'st', 'th', 'tr')
+NUCLEI = ('a', 'e', 'i', 'o', 'u', 'ai', 'ea', 'ee', 'oo', 'ou')
+CODAS = ('', 'k', 'l', 'm', 'n', 'r', 's', 't', 'nd', 'ng', 'rt', 'st')
+
+Template = namedtuple('Template', 'pattern length literal groups bits')
+Template.__doc__ = """A compiled template: its literal bytes, (Charset, positions) per class and exact entropy."""
+
+MarkovModel = namedtuple('MarkovModel', 'syllables capitalized ends successors width')
+MarkovModel.__doc__ = """Syllable transition table: syllable strings, the state each ends in and flat successor arrays."""
+
+
+@lru_cache(maxsize=256)
+def compile_template(pattern):
+    """Compile a template string into a memoized Template."""
+    literal = []
+    positions = {}
+    chars = iter(pattern)
+    for char in chars:
+        if char == ESCAPE:
+            char = next(chars, None)
+            if char is None:
+                raise ValueError("Template cannot end with an escape character!")
+        elif char in TEMPLATE_CLASSES:
+            positions.setdefault(char, []).append(len(literal))
+        literal.append(char)
+    if not positions:
+        raise ValueError(f"Template has no random characters; use {', '.join(TEMPLATE_CLASSES)}!")
+    try:
+        literal = ''.join(literal).encode('ascii')
+    except UnicodeEncodeError:
+        raise ValueError("Template must contain only ASCII characters!")
+
+    groups = tuple((password_engine.charset_from_chars(TEMPLATE_CLASSES[cls]), tuple(slots))
+                   for cls, slots in positions.items())
+    bits = sum(len(slots) * math.log2(len(charset)) for charset, slots in groups)
+    return Template(pattern, len(literal), literal, groups, bits)
+
+
+def template_entropy(pattern):
+    """Exact entropy in bits of passwords generated from a template."""
+    return compile_template(pattern).bits
+
+
+def generate_from_template(pattern, count):
+    """Generate `count` passwords from a template in one pass."""
+    if count < 0:
+        raise ValueError("Count cannot be negative!")
+    template = compile_template(pattern)
+    length = template.length
+    buffer = bytearray(template.literal * count)
+    for charset, slots in template.groups:
+        # One draw covers this class's positions in every password of the batch
+        drawn = password_engine.random_chars(charset, len(slots) * count)
+        for i, position in enumerate(slots):
+            buffer[position::length] = drawn[i::len(slots)]
+    data = buffer.decode('ascii')
+    return [data[i:i + length] for i in range(0, length * count, length)]
+
+
+def _boundaries():
+    """Consonant runs (coda + onset) at a syllable boundary that can only be split one way."""
+    splits = {}
+    for coda in CODAS:
+        for onset in ONSETS:
+            splits.setdefault(coda + onset, []).append((coda, onset))
+    return {pair for pairs in splits.values() if len(pairs) == 1 for pair in pairs}
+
+
+@lru_cache(maxsize=None)
+def markov_model():
+    """Build (once) the syllable transition table used for pronounceable passwords."""
+    syllables = [onset + nucleus + coda
+                 for onset in ONSETS for nucleus in NUCLEI for coda in CODAS]
+    allowed = _boundaries()
+    # Successors of each state (a coda), kept only where the boundary is unambiguous
+    choices = [[i for i, syllable in enumerate(syllables)
+                if (coda, ONSETS[i // (len(NUCLEI) * len(CODAS))]) in allowed]
+               for coda in CODAS]
+    # Every state gets the same number of successors, evenly spread over its choices
+    width = min(len(successors) for successors in choices)
+    successors = array('H')
+    for state in choices:
+        successors.extend(state[i * len(state) // width] for i in range(width))
+    ends = array('B', (i % len(CODAS) for i in range(len(syllables))))
+    capitalized = tuple(syllable.capitalize() for syllable in syllables)
+    return MarkovModel(tuple(syllables), capitalized, ends, successors, width)
+
+
+def pronounceable_entropy(syllables, digits=0):
+    """Exact entropy in bits of pronounceable passwords with these settings."""
+    model = markov_model()
+    bits = math.log2(len(model.syllables)) + (syllables - 1) * math.log2(model.width)
+    return bits + digits * math.log2(len(password_engine.DIGITS))
+
+
+def generate_pronounceable(syllables, count, separator='', capitalize=False, digits=0):
+    """Generate `count` pronounceable passwords of `syllables` syllables each.
+
+    With `capitalize` the first letter is a capital, and `digits` random
+    digits are appended.
+    """
+    if syllables < 1:
+        raise ValueError("Pronounceable passwords need at least one syllable!")
+    if digits < 0:
+        raise ValueError("Digits cannot be negative!")
+    if count < 0:
+        raise ValueError("Count cannot be negative!")
+    if not count:
+        return []
+
+    model = markov_model()
+    ends, successors, width = model.ends, model.successors, model.width
+    current = password_engine.random_indices(len(model.syllables), count)
+    first = model.capitalized if capitalize else model.syllables
+    steps = [[first[i] for i in current]]
+    for _ in range(syllables - 1):
+        # One lookup per syllable: the successor table row of the current syllable's state
+        current = [successors[ends[i] * width + r]
+                   for i, r in zip(current, password_engine.random_indices(width, count))]
+        steps.append([model.syllables[i] for i in current])
+    passwords = list(map(separator.join, zip(*steps)))
+    if digits:
+        digit_runs = password_engine.DIGITS.generate_batch(digits, count)
+        passwords = list(map(str.__add__, passwords, digit_runs))
+    return passwords
@@ -0,0 +1,184 @@
+"""
+Password Policies
+Builds passwords that satisfy a policy directly, without regenerating.
+
+A policy sets minimum counts per character class, a maximum run of the same
+character and forbidden sequences. Generation fills the password from the
+whole charset and writes the required characters of each class over secure
+random positions. A character that would break the repeat limit or complete
+a forbidden sequence is then redrawn from its own class on the spot, so the
+work per character is bounded and there is no generate-until-valid loop.
+A batch draws all of its randomness in a few large calls, and only
+passwords that break the repeat limit or contain a forbidden sequence are
+walked character by character.
+
+Characters are classified with the same lookup table the strength scorer
+uses, and repaired passwords are validated against the policy.
+"""
+
+from functools import lru_cache
+
+import password_engine
+import password_strength
+from password_strength import UPPER, LOWER, DIGIT, SYMBOL
+
+# Redraws allowed for a single position before the policy is deemed unsatisfiable
+MAX_REDRAWS = 64
+
+
+class PasswordPolicy:
+    """Requirements a generated password must meet."""
+
+    def __init__(self, min_upper=0, min_lower=0, min_digits=0, min_symbols=0,
+                 max_consecutive=None, forbidden=()):
+        for value in (min_upper, min_lower, min_digits, min_symbols):
+            if value < 0:
+                raise ValueError("Minimum counts cannot be negative!")
+        if max_consecutive is not None and max_consecutive < 1:
+            raise ValueError("Maximum consecutive characters must be at least 1!")
+        self.minimums = {UPPER: min_upper, LOWER: min_lower, DIGIT: min_digits, SYMBOL: min_symbols}
+        self.max_consecutive = max_consecutive
+        # Sequences are matched case-insensitively
+        self.forbidden = tuple(seq.lower() for seq in forbidden if seq)
+        self.longest_forbidden = max(map(len, self.forbidden), default=0)
+
+    @property
+    def min_length(self):
+        return sum(self.minimums.values())
+
+    def violations(self, password):
+        """Return a list of the ways `password` breaks this policy (empty if compliant)."""
+        problems = []
+        classes = password.translate(password_strength.CLASS_TABLE)
+        names = {UPPER: "uppercase letters", LOWER: "lowercase letters",
+                 DIGIT: "digits", SYMBOL: "symbols"}
+        for cls, minimum in self.minimums.items():
+            if classes.count(cls) < minimum:
+                problems.append(f"needs at least {minimum} {names[cls]}")
+
+        if self.max_consecutive is not None:
+            run = 0
+            for i, c in enumerate(password):
+                run = run + 1 if i and c == password[i - 1] else 1
+                if run > self.max_consecutive:
+                    problems.append(f"repeats a character more than {self.max_consecutive} times in a row")
+                    break
+
+        lowered = password.lower()
+        for seq in self.forbidden:
+            if seq in lowered:
+                problems.append(f"contains forbidden sequence {seq!r}")
+        return problems
+
+    def is_valid(self, password):
+        return not self.violations(password)
+
+
+@lru_cache(maxsize=256)
+def _class_pools(chars):
+    """Split a charset into compiled per-class charsets using the strength class table."""
+    classes = chars.translate(password_strength.CLASS_TABLE)
+    pools = {}
+    for c, cls in zip(chars, classes):
+        pools[cls] = pools.get(cls, '') + c
+    return {cls: password_engine.charset_from_chars(pool) for cls, pool in pools.items()}
+
+
+@lru_cache(maxsize=64)
+def _run_pattern(max_consecutive):
+    """A regex matching a run of more than `max_consecutive` identical characters."""
+    import re
+    return re.compile(r'(.)\1{%d}' % max_consecutive, re.S)
+
+
+def _breaks_policy(built, c, policy):
+    """Would appending `c` exceed the repeat limit or complete a forbidden sequence?"""
+    limit = policy.max_consecutive
+    if limit is not None and len(built) >= limit and all(p == c for p in built[-limit:]):
+        return True
+    if policy.forbidden:
+        tail = (''.join(built[-policy.longest_forbidden:]) + c).lower()
+        for seq in policy.forbidden:
+            if tail.endswith(seq):
+                return True
+    return False
+
+
+def _repair(password, pools, policy):
+    """Redraw, within the same class, each character that would break the repeat limit or complete a forbidden sequence."""
+    built = []
+    for c in password:
+        redraws = 0
+        while _breaks_policy(built, c, policy):
+            redraws += 1
+            if redraws > MAX_REDRAWS:
+                raise ValueError("Could not satisfy the password policy with this character set!")
+            c = pools[c.translate(password_strength.CLASS_TABLE)].generate(1)
+        built.append(c)
+    password = ''.join(built)
+    # Redraws keep every class count, so the result complies; validate anyway
+    problems = policy.violations(password)
+    if problems:
+        raise ValueError(f"Generated password broke the policy: {problems[0]}")
+    return password
+
+
+def generate_password(charset, length, policy):
+    """Build one password from `charset` that satisfies `policy`."""
+    return generate_passwords(charset, length, 1, policy)[0]
+
+
+def generate_passwords(charset, length, count, policy):
+    """Build `count` policy-compliant passwords.
+
+    The fill characters, the required characters of each class and the
+    positions they go to are drawn for the whole batch at once and sliced
+    per password.
+    """
+    if not isinstance(charset, password_engine.Charset):
+        charset = password_engine.charset_from_chars(charset)
+    pools = _class_pools(charset.chars)
+    for cls, minimum in policy.minimums.items():
+        if minimum and cls not in pools:
+            raise ValueError("The character set has no characters for a required class!")
+    if policy.min_length > length:
+        raise ValueError("Password length is too short for the policy's minimum counts!")
+    if length < 1:
+        raise ValueError("Password length must be at least 1!")
+    if count < 1:
+        return []
+
+    # A uniform password from the whole charset, with the required characters
+    # written over a random ordered choice of distinct positions. This is the
+    # same distribution as shuffling the required characters in with the
+    # rest, without sorting every password.
+    filler = password_engine.random_chars(charset, length * count).decode('ascii')
+    k = policy.min_length
+    if not k:
+        passwords = [filler[i:i + length] for i in range(0, length * count, length)]
+    else:
+        required = [(password_engine.random_chars(pools[cls], minimum * count).decode('ascii'), minimum)
+                    for cls, minimum in policy.minimums.items() if minimum]
+        # The t-th required character goes to one of the length - t positions still free
+        picks = list(zip(*[password_engine.random_indices(length - t, count) for t in range(k)]))
+        positions = list(range(length))
+        passwords = []
+        for i in range(count):
+            chars = list(filler[i * length:(i + 1) * length])
+            free = positions[:]
+            placed = ''.join([draws[i * n:(i + 1) * n] for draws, n in required])
+            for c, pick in zip(placed, picks[i]):
+                chars[free.pop(pick)] = c
+            passwords.append(''.join(chars))
+
+    # Only passwords that actually break the repeat limit or a forbidden
+    # sequence go through the per-character repair
+    runs = None if policy.max_consecutive is None else _run_pattern(policy.max_consecutive)
+    forbidden = policy.forbidden
+    if runs is not None or forbidden:
+        for i, password in enumerate(passwords):
+            lowered = password.lower()
+            if ((runs is not None and runs.search(password))
+                    or any(seq in lowered for seq in forbidden)):
+                passwords[i] = _repair(password, pools, policy)
+    return passwords
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Password Generation Service
+A small asyncio HTTP/1.1 server exposing generation, strength checking and
+the saved-password vault on localhost.
+
+Provisioning scripts can keep one connection open (keep-alive) and send
+batch requests instead of spawning a Python process per credential. The
+server keeps compiled charsets and a pre-filled randomness pool in memory
+between requests and never reads the vault for plain generation.
+
+Requests are handled on worker threads, never on the event loop, so a large
+batch on one connection does not stall the others. Every vault request runs
+on a single dedicated thread: writes are serialized, and a SQLite vault is
+only ever used from the thread that opened it.
+
+The service only listens on a loopback address and has no authentication,
+so it refuses anything a web page could send it: requests whose Host or
+Origin is not local (DNS rebinding, cross-site reads) and POSTs that are
+not application/json (cross-site form submissions).
+
+Endpoints (JSON in, JSON out):
+  POST /generate   {"length": 16, "count": 10, "symbols": false, "policy": {...}}
+                   or {"words": 6, "count": 10} for passphrases (from the
+                   server's --wordlist; clients cannot pick a file)
+  POST /strength   {"passwords": ["...", ...]}
+  POST /vault      {"password": "...", "description": "..."}
+                   or {"entries": [{"password": ..., "description": ...}, ...]}
+  GET  /vault      ?search=&since=&until=&min_length=&limit=&offset=
+
+The same generation requests can also be streamed through a pipe with
+serve_lines (the CLI's --stdin mode): one JSON request per input line, one
+JSON result per output line, in order.
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import os
+import select
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+import password_engine
+import password_passphrase
+import password_policy
+import password_strength
+from password_core import DEFAULT_VAULT_FILE, MASTER_PASSWORD_ENV, PasswordCore, read_master_password
+from password_vault import is_encrypted
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Limits that keep a single request from monopolising the server
+MAX_BODY_SIZE = 16 * 1024 * 1024
+MAX_COUNT = 100000
+MAX_LENGTH = 1024
+MAX_WORDS = 64
+MAX_DIGITS = 64
+MAX_SEPARATOR_LENGTH = 16
+# Characters one /generate response may hold (count * length)
+MAX_CHARACTERS = 16 * 1024 * 1024
+DEFAULT_LIST_LIMIT = 100
+MAX_LIST_LIMIT = 10000
+
+# Threads that run generation and strength requests off the event loop
+HANDLER_THREADS = 4
+
+CHARSET_OPTIONS = ('uppercase', 'lowercase', 'numbers', 'symbols',
+                   'exclude_similar', 'exclude_ambiguous', 'include', 'exclude')
+POLICY_OPTIONS = ('min_upper', 'min_lower', 'min_digits', 'min_symbols',
+                  'max_consecutive', 'forbidden')
+PASSPHRASE_OPTIONS = ('words', 'separator', 'capitalize', 'digits')
+
+# Output is flushed once this many results are buffered, or when no more input is waiting
+LINE_FLUSH_COUNT = 1000
+
+REASONS = {200: 'OK', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found',
+           405: 'Method Not Allowed', 413: 'Payload Too Large', 415: 'Unsupported Media Type',
+           500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    """A client error, reported as an HTTP status with a JSON message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def is_loopback(host):
+    """Is `host` (a name or address) this machine?"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def check_headers(method, headers):
+    """Refuse a request that a web page, rather than a local client, could have sent."""
+    if not is_loopback(urlsplit('//' + headers.get('host', '')).hostname or ''):
+        raise RequestError(403, "Host must be localhost")
+    origin = headers.get('origin')
+    if origin is not None and not is_loopback(urlsplit(origin).hostname or ''):
+        raise RequestError(403, "Cross-origin requests are not allowed")
+    content_type = headers.get('content-type', '').partition(';')[0].strip().lower()
+    if method == 'POST' and content_type != 'application/json':
+        raise RequestError(415, "Content-Type must be application/json")
+
+
+def _bounded(params, key, default, low, high):
+    """Read an integer request field, checking that it lies between `low` and `high`."""
+    value = int(params.get(key, default))
+    if not low <= value <= high:
+        raise ValueError(f"{key} must be between {low} and {high}")
+    return value
+
+
+class PasswordService:
+    """Routes decoded requests to the generator, strength scorer and vault."""
+
+    def __init__(self, vault_file=None, breach_filter=None, wordlist=None, master_password=None):
+        self.generator = PasswordCore(vault_file, breach_filter, master_password)
+        # Passphrases always come from this file, chosen by whoever started the server
+        self.wordlist = wordlist
+        # Open the breach filter, compile the default charset and fill the
+        # randomness pool up front so the first requests are as fast as the rest
+        self.reject = self.generator.is_breached if self.generator.breach_checker else None
+        self.generator.build_charset()
+        password_engine.get_pool().warm()
+        self.executor = ThreadPoolExecutor(HANDLER_THREADS, thread_name_prefix='password-service')
+        self.vault_executor = ThreadPoolExecutor(1, thread_name_prefix='password-vault')
+
+    def executor_for(self, target):
+        """The executor that requests for `target` run on."""
+        return self.vault_executor if urlsplit(target).path == '/vault' else self.executor
+
+    def close(self):
+        """Stop the worker threads once their current requests are done."""
+        self.executor.shutdown()
+        self.vault_executor.shutdown()
+
+    def handle(self, method, target, body):
+        """Return (status, payload) for one request."""
+        url = urlsplit(target)
+        routes = {
+            ('POST', '/generate'): self.generate,
+            ('POST', '/strength'): self.strength,
+            ('POST', '/vault'): self.save,
+            ('GET', '/vault'): self.list,
+        }
+        handler = routes.get((method, url.path))
+        if handler is None:
+            if any(path == url.path for _, path in routes):
+                raise RequestError(405, f"{method} is not allowed on {url.path}")
+            raise RequestError(404, f"No such endpoint: {url.path}")
+
+        if method == 'GET':
+            params = dict(parse_qsl(url.query))
+        else:
+            try:
+                params = json.loads(body or b'{}')
+            except ValueError:
+                raise RequestError(400, "Request body must be valid JSON")
+            if not isinstance(params, dict):
+                raise RequestError(400, "Request body must be a JSON object")
+        try:
+            return 200, handler(params)
+        except (ValueError, TypeError, KeyError) as e:
+            raise RequestError(400, str(e))
+
+    def generate(self, params):
+        count = _bounded(params, 'count', 1, 1, MAX_COUNT)
+
+        if params.get('words') is not None:
+            options = {key: params[key] for key in PASSPHRASE_OPTIONS if key in params}
+            options['words'] = _bounded(params, 'words', 6, 1, MAX_WORDS)
+            options['digits'] = _bounded(params, 'digits', 0, 0, MAX_DIGITS)
+            if len(str(options.get('separator', ''))) > MAX_SEPARATOR_LENGTH:
+                raise ValueError(f"separator can be at most {MAX_SEPARATOR_LENGTH} characters")
+            chunks = self.generator.generate_passphrase_chunks(count, wordlist=self.wordlist,
+                                                               reject=self.reject, **options)
+        else:
+            options = {key: params[key] for key in CHARSET_OPTIONS if key in params}
+            policy = None
+            if params.get('policy'):
+                policy_options = params['policy']
+                policy = password_policy.PasswordPolicy(
+                    **{key: policy_options[key] for key in POLICY_OPTIONS if key in policy_options})
+            length = _bounded(params, 'length', 16, 1, MAX_LENGTH)
+            if count * length > MAX_CHARACTERS:
+                raise ValueError(f"count * length can be at most {MAX_CHARACTERS}")
+            chunks = self.generator.generate_chunks(count, length,
+                                                    reject=self.reject, policy=policy, **options)
+        passwords = []
+        for chunk in chunks:
+            passwords.extend(chunk)
+        return {"passwords": passwords}
+
+    def strength(self, params):
+        passwords = params.get('passwords')
+        if passwords is None and 'password' in params:
+            passwords = [params['password']]
+        if not isinstance(passwords, list):
+            raise ValueError("passwords must be a list")
+        results = []
+        for password, (label, score, bits) in zip(passwords, password_strength.analyze_many(passwords)):
+            results.append({
+                "strength": label,
+                "score": score,
+                "bits": round(bits, 2),
+                "breached": self.generator.is_breached(password),
+            })
+        return {"results": results}
+
+    def save(self, params):
+        entries = params.get('entries', [params])
+        if not isinstance(entries, list):
+            raise ValueError("entries must be a list")
+        for entry in entries:
+            if not isinstance(entry, dict) or not isinstance(entry.get('password'), str):
+                raise ValueError("Each entry must have a password string")
+            if not isinstance(entry.get('description', ''), str):
+                raise ValueError("description must be a string")
+        records = self.generator.add_passwords(
+            (entry['password'], entry.get('description', '')) for entry in entries)
+        return {"saved": len(records), "duplicates": len(entries) - len(records)}
+
+    def list(self, params):
+        limit = int(params.get('limit', DEFAULT_LIST_LIMIT))
+        if not 0 <= limit <= MAX_LIST_LIMIT:
+            raise ValueError(f"limit must be between 0 and {MAX_LIST_LIMIT}")
+        min_length = params.get('min_length')
+        vault = self.generator.vault
+        if vault is None:
+            raise ValueError("The vault could not be opened")
+        entries = list(vault.query(
+            search=params.get('search'),
+            since=params.get('since'),
+            until=params.get('until'),
+            min_length=int(min_length) if min_length else None,
+            limit=limit,
+            offset=int(params.get('offset', 0)),
+        ))
+        return {"entries": entries}
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload).encode('utf-8')
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+async def handle_connection(service, reader, writer):
+    """Serve requests on one connection until the client closes it."""
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+            except ValueError:
+                writer.write(_response(400, {"error": "Malformed request line"}, False))
+                break
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            keep_alive = (version == 'HTTP/1.1'
+                          and headers.get('connection', '').lower() != 'close')
+
+            try:
+                length = int(headers.get('content-length') or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                writer.write(_response(400, {"error": "Invalid Content-Length"}, False))
+                break
+            if length > MAX_BODY_SIZE:
+                writer.write(_response(413, {"error": "Request body too large"}, False))
+                break
+            body = await reader.readexactly(length) if length else b''
+
+            try:
+                check_headers(method, headers)
+                status, payload = await loop.run_in_executor(
+                    service.executor_for(target), service.handle, method, target, body)
+            except RequestError as e:
+                status, payload = e.status, {"error": str(e)}
+            except Exception as e:
+                status, payload = 500, {"error": str(e)}
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def _input_waiting(stream):
+    """Can more input be read from `stream` without blocking? (False if this cannot be checked)"""
+    if os.name == 'nt':
+        return False
+    try:
+        return bool(select.select([stream], [], [], 0)[0])
+    except (OSError, ValueError, TypeError):
+        return False
+
+
+def serve_lines(service, inp, out):
+    """Answer newline-delimited JSON generation requests from `inp` on `out`.
+    
+    Each non-blank line is a /generate request body, optionally with an "id"
+    that is echoed back. Each answer is one line, {"passwords": [...]} or
+    {"error": "..."}. Answers are buffered and flushed in batches, but never
+    held back while the other end may be waiting for them. Returns the
+    number of requests answered.
+    """
+    pending = []
+    answered = 0
+    for line in inp:
+        if not line.strip():
+            continue
+        params = None
+        try:
+            params = json.loads(line)
+            if not isinstance(params, dict):
+                raise ValueError("Request must be a JSON object")
+            result = service.generate(params)
+        except (ValueError, TypeError, KeyError) as e:
+            result = {"error": str(e)}
+        if isinstance(params, dict) and 'id' in params:
+            result = {"id": params['id'], **result}
+        pending.append(json.dumps(result))
+        answered += 1
+        if len(pending) >= LINE_FLUSH_COUNT or not _input_waiting(inp):
+            out.write("\n".join(pending) + "\n")
+            out.flush()
+            pending = []
+    if pending:
+        out.write("\n".join(pending) + "\n")
+        out.flush()
+    return answered
+
+
+async def start_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Start listening and return the asyncio server."""
+    return await asyncio.start_server(
+        lambda reader, writer: handle_connection(service, reader, writer), host, port)
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, vault_file=None, breach_filter=None,
+          wordlist=None, master_password=None):
+    """Run the service until interrupted. Returns an exit status."""
+    service = PasswordService(vault_file, breach_filter, wordlist, master_password)
+    if master_password is not None:
+        # Check the master password now, on the vault thread, rather than on the first request
+        if service.vault_executor.submit(lambda: service.generator.vault).result() is None:
+            print(f"❌ Error: {service.generator.vault_error}")
+            service.close()
+            return 1
+
+    async def run():
+        server = await start_server(service, host, port)
+        print(f"🔐 Password service listening on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("👋 Goodbye!")
+    finally:
+        service.close()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve password generation over HTTP on localhost")
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST,
+                       help=f'Loopback address to listen on (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                       help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--vault', type=str, default=None,
+                       help='Vault file for /vault (default: cli_saved_passwords.jsonl)')
+    parser.add_argument('--breach-filter', type=str, default=None,
+                       help='Breach filter file to check passwords against')
+    parser.add_argument('--wordlist', type=str, default=None,
+                       help='Wordlist file for passphrase requests (default: '
+                            f'{password_passphrase.DEFAULT_WORDLIST_FILE} if it exists)')
+    parser.add_argument('--encrypt', action='store_true',
+                       help='Encrypt the vault with a master password (converts a plaintext vault; '
+                            f'the password is read from ${MASTER_PASSWORD_ENV} or prompted for)')
+    args = parser.parse_args(argv)
+    # The vault is served without authentication, so it must not be reachable from the network
+    if not is_loopback(args.host):
+        parser.error(f"--host must be a loopback address, not {args.host}")
+    master_password = None
+    # Encrypted vaults need the master password; it is asked for once, before serving
+    if args.encrypt or is_encrypted(args.vault or DEFAULT_VAULT_FILE):
+        master_password = read_master_password()
+    return serve(args.host, args.port, args.vault, args.breach_filter, args.wordlist,
+                 master_password)
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,103 @@
+"""
+Password Strength Estimation
+Entropy-based strength scoring shared by the CLI and GUI.
+
+Every character is mapped to its class (uppercase, lowercase, digit, symbol
+or other) by one str.translate call against a precomputed lookup table, so
+classifying a password is a single pass done in C. Entropy is then
+length * log2(pool size), where the pool is the generating charset when it
+is known and otherwise the union of the classes that appear.
+"""
+
+import math
+from collections import namedtuple
+from itertools import repeat
+
+from password_engine import UPPERCASE, LOWERCASE, NUMBERS
+
+UPPER, LOWER, DIGIT, SYMBOL = 'U', 'L', 'D', 'S'
+
+# Number of possible characters contributed by each class
+POOL_SIZES = {
+    UPPER: 26,
+    LOWER: 26,
+    DIGIT: 10,
+    SYMBOL: 33,  # ASCII punctuation plus space
+}
+# Pool size assumed for any character outside printable ASCII
+OTHER_POOL_SIZE = 100
+
+# string.punctuation, without importing `string` (and `re` with it)
+PUNCTUATION = r"""!"#$%&'()*+,-./:;<=>?@[\]^_`{|}~"""
+
+CLASS_TABLE = str.maketrans(
+    UPPERCASE + LOWERCASE + NUMBERS + PUNCTUATION + ' ',
+    UPPER * 26 + LOWER * 26 + DIGIT * 10 + SYMBOL * 33
+)
+
+# Entropy (bits) needed for each strength level, checked from the top
+LEVELS = (
+    (80, "Strong"),
+    (60, "Good"),
+    (36, "Fair"),
+    (0, "Weak"),
+)
+
+Strength = namedtuple('Strength', 'label score bits')
+Strength.__doc__ = """Strength rating: a level name, the 0-6 checklist score and bits of entropy."""
+
+
+def _classes(password):
+    """Return the set of character classes present in a password."""
+    return set(password.translate(CLASS_TABLE))
+
+
+def _pool_size(classes):
+    pool = 0
+    for cls in classes:
+        pool += POOL_SIZES.get(cls, 0)
+    # Anything left untranslated is outside printable ASCII
+    if not classes <= POOL_SIZES.keys():
+        pool += OTHER_POOL_SIZE
+    return pool
+
+
+def _entropy(length, classes, charset):
+    pool = len(charset) if charset is not None else _pool_size(classes)
+    return length * math.log2(pool) if length and pool > 1 else 0.0
+
+
+def rate_entropy(bits):
+    """Return the strength level name for an entropy figure."""
+    for threshold, label in LEVELS:
+        if bits >= threshold:
+            return label
+    return LEVELS[-1][1]
+
+
+def estimate_entropy(password, charset=None):
+    """Estimate the entropy of a password in bits.
+
+    Pass the generating `charset` (a Charset or string) when it is known for
+    an exact figure instead of an estimate from the classes present.
+    """
+    classes = _classes(password) if charset is None else None
+    return _entropy(len(password), classes, charset)
+
+
+def analyze(password, charset=None):
+    """Rate a password, returning a Strength(label, score, bits)."""
+    classes = _classes(password)
+    length = len(password)
+
+    # Checklist score: two points for length, one per character class
+    score = (length >= 8) + (length >= 12)
+    score += (UPPER in classes) + (LOWER in classes) + (DIGIT in classes) + (SYMBOL in classes)
+
+    bits = _entropy(length, classes, charset)
+    return Strength(rate_entropy(bits), score, bits)
+
+
+def analyze_many(passwords, charset=None):
+    """Lazily rate an iterable of passwords, e.g. a whole vault or import file."""
+    return map(analyze, passwords, repeat(charset))
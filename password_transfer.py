@@ -0,0 +1,377 @@
+"""
+Vault Import/Export
+Streams saved passwords between the vault and CSV, JSON Lines or KeePass-style XML files.
+
+Readers yield one row at a time and writers emit one record at a time
+into a buffer that is flushed in large blocks, so files of any size move
+through in constant memory. Imported rows are appended to the vault in
+batches of IMPORT_BATCH_SIZE (one write, or one SQLite transaction, per
+batch), and passwords the vault already holds are skipped using its
+duplicate index.
+
+Run through the CLI:
+  python cli_password_generator.py export passwords.csv
+  python cli_password_generator.py import keepass.xml --rescore
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+import password_strength
+from password_core import PasswordCore, read_master_password
+from password_vault import is_encrypted
+
+FORMATS = ('csv', 'jsonl', 'xml')
+EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.xml': 'xml'}
+
+# Column order for CSV files, as written by --list --format csv
+FIELDS = ('description', 'password', 'length', 'timestamp')
+# Column names other password managers use, mapped to vault fields
+FIELD_ALIASES = {'title': 'description', 'name': 'description', 'created': 'timestamp'}
+
+IMPORT_BATCH_SIZE = 10000
+PROGRESS_INTERVAL = 100000
+WRITE_BUFFER_SIZE = 64 * 1024
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+XML_GROUP_NAME = "Password Generator"
+
+# Minimum entropy (bits) for each strength level
+STRENGTH_BITS = {label: bits for bits, label in password_strength.LEVELS}
+
+
+def detect_format(path, fmt=None):
+    """The file format to use for `path`: `fmt` if given, else its extension's."""
+    fmt = fmt or EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt not in FORMATS:
+        raise ValueError(f"Cannot tell the format of {path}; pass --format ({', '.join(FORMATS)})!")
+    return fmt
+
+
+@lru_cache(maxsize=4096)
+def _local_time(value):
+    """A vault (local) timestamp for an imported time string, or None if it cannot be read."""
+    value = value.strip()
+    # Vault-style local times are taken as they are
+    if len(value) == 19 and value[4] == '-' and value[10] == ' ':
+        return value
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    # ISO times with a zone (KeePass uses UTC) are converted to local time
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed.strftime(TIMESTAMP_FORMAT)
+
+
+def _timestamp(value):
+    """A vault timestamp for `value`, or the current time if it cannot be read."""
+    # Bulk exports share a handful of timestamps, so conversions are cached
+    timestamp = _local_time(value) if isinstance(value, str) and value else None
+    return timestamp or datetime.now().strftime(TIMESTAMP_FORMAT)
+
+
+def to_record(row):
+    """Build a vault record from an imported row, or None if it has no password."""
+    password = row.get('password')
+    if not isinstance(password, str) or not password:
+        return None
+    description = row.get('description')
+    # JSON rows can hold any value; the vault only stores text
+    if isinstance(description, (int, float)):
+        description = str(description)
+    elif not isinstance(description, str):
+        description = None
+    return {
+        "password": password,
+        "description": description or "No description",
+        "timestamp": _timestamp(row.get('timestamp')),
+        "length": len(password)
+    }
+
+
+def _read_csv(f):
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = [FIELD_ALIASES.get(name.strip().lower(), name.strip().lower()) for name in header]
+    if 'password' not in columns:
+        raise ValueError("CSV file has no password column!")
+    for values in reader:
+        yield dict(zip(columns, values))
+
+
+def _read_jsonl(f):
+    for number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {number}: {e}")
+        if isinstance(row, dict):
+            yield {FIELD_ALIASES.get(name, name): value for name, value in row.items()}
+
+
+def _read_xml(f):
+    """Yield entries of a KeePass 2.x XML export, dropping each one once it is read."""
+    path = []
+    for event, elem in ElementTree.iterparse(f, events=('start', 'end')):
+        if event == 'start':
+            path.append(elem)
+            continue
+        path.pop()
+        # Old versions of an entry live in its <History> and are not imported
+        if elem.tag != 'Entry' or (path and path[-1].tag == 'History'):
+            continue
+        row = {}
+        for string in elem.iterfind('String'):
+            key, value = string.findtext('Key'), string.findtext('Value')
+            if key == 'Title':
+                row['description'] = value
+            elif key == 'Password':
+                row['password'] = value
+        row['timestamp'] = elem.findtext('Times/CreationTime')
+        if path:
+            path[-1].remove(elem)
+        yield row
+
+
+READERS = {'csv': _read_csv, 'jsonl': _read_jsonl, 'xml': _read_xml}
+
+
+def read_rows(f, fmt):
+    """Yield each row of an open import file as a dict of vault field names to values."""
+    return READERS[fmt](f)
+
+
+def import_records(rows, vault, index=None, rescore=False, min_strength=None,
+                   batch_size=IMPORT_BATCH_SIZE, progress=None, progress_every=PROGRESS_INTERVAL):
+    """Append imported rows to `vault` in batches and return counts of what happened.
+
+    Rows without a password are counted as invalid. With a DedupeIndex,
+    passwords the vault (or an earlier row) already has are skipped as
+    duplicates. With `rescore`, each password is rated and the counts per
+    strength level are reported; `min_strength` (a level name) also skips
+    passwords rated below it. `progress(rows, seconds)` is called every
+    `progress_every` rows.
+    """
+    if min_strength is not None and min_strength not in STRENGTH_BITS:
+        raise ValueError(f"Unknown strength level: {min_strength}")
+    min_bits = STRENGTH_BITS.get(min_strength, 0)
+    rescore = rescore or min_strength is not None
+
+    stats = {"rows": 0, "imported": 0, "duplicates": 0, "invalid": 0, "weak": 0}
+    if rescore:
+        stats["strength"] = dict.fromkeys(STRENGTH_BITS, 0)
+    start = time.perf_counter()
+    batch = []
+    try:
+        for row in rows:
+            stats["rows"] += 1
+            if progress is not None and stats["rows"] % progress_every == 0:
+                progress(stats["rows"], time.perf_counter() - start)
+
+            record = to_record(row)
+            if record is None:
+                stats["invalid"] += 1
+                continue
+            if rescore:
+                strength = password_strength.analyze(record["password"])
+                if strength.bits < min_bits:
+                    stats["weak"] += 1
+                    continue
+            if index is not None and not index.add_password(record["password"]):
+                stats["duplicates"] += 1
+                continue
+            if rescore:
+                stats["strength"][strength.label] += 1
+
+            batch.append(record)
+            if len(batch) >= batch_size:
+                vault.append_many(batch)
+                stats["imported"] += len(batch)
+                batch = []
+        if batch:
+            vault.append_many(batch)
+            stats["imported"] += len(batch)
+    except BaseException:
+        # The index may now list passwords that never reached the vault
+        if index is not None:
+            index.reset()
+        raise
+    if index is not None:
+        index.sync(vault.path)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+@lru_cache(maxsize=4096)
+def _utc_time(timestamp):
+    """A vault (local) timestamp as the UTC time KeePass expects."""
+    try:
+        created = datetime.strptime(timestamp, TIMESTAMP_FORMAT).astimezone(timezone.utc)
+    except ValueError:
+        return timestamp
+    return created.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _xml_entry(record):
+    return ("\t\t\t<Entry>\n"
+            f"\t\t\t\t<String><Key>Title</Key><Value>{escape(record['description'])}</Value></String>\n"
+            "\t\t\t\t<String><Key>Password</Key>"
+            f"<Value ProtectInMemory=\"True\">{escape(record['password'])}</Value></String>\n"
+            f"\t\t\t\t<Times><CreationTime>{_utc_time(record['timestamp'])}</CreationTime></Times>\n"
+            "\t\t\t</Entry>\n")
+
+
+def export_records(records, out, fmt, progress=None, progress_every=PROGRESS_INTERVAL):
+    """Write records to an open file in `fmt` and return how many were written.
+
+    Besides the import/export FORMATS, `fmt` may be 'json' (one array) or
+    'plain' (passwords only, one per line), as --list writes them.
+    """
+    # Rows are collected in memory and written out in large blocks
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator='\n')
+    if fmt == 'csv':
+        writer.writerow(FIELDS)
+    elif fmt == 'json':
+        buf.write("[")
+    elif fmt == 'xml':
+        buf.write('<?xml version="1.0" encoding="utf-8" standalone="yes"?>\n'
+                  f"<KeePassFile>\n\t<Root>\n\t\t<Group>\n\t\t\t<Name>{XML_GROUP_NAME}</Name>\n")
+
+    start = time.perf_counter()
+    count = 0
+    for record in records:
+        if fmt == 'csv':
+            writer.writerow([record[field] for field in FIELDS])
+        elif fmt == 'jsonl':
+            buf.write(json.dumps(record) + "\n")
+        elif fmt == 'json':
+            buf.write((",\n  " if count else "\n  ") + json.dumps(record))
+        elif fmt == 'plain':
+            buf.write(record['password'] + "\n")
+        else:
+            buf.write(_xml_entry(record))
+        count += 1
+        if progress is not None and count % progress_every == 0:
+            progress(count, time.perf_counter() - start)
+
+        if buf.tell() >= WRITE_BUFFER_SIZE:
+            out.write(buf.getvalue())
+            buf.seek(0)
+            buf.truncate()
+
+    if fmt == 'json':
+        buf.write("\n]\n" if count else "]\n")
+    elif fmt == 'xml':
+        buf.write("\t\t</Group>\n\t</Root>\n</KeePassFile>\n")
+    out.write(buf.getvalue())
+    return count
+
+
+def _open(path, mode, fmt):
+    """Open an import/export file ('-' is stdin/stdout); XML is read as bytes."""
+    if path == '-':
+        stream = sys.stdin if mode == 'r' else sys.stdout
+        return stream.buffer if fmt == 'xml' and mode == 'r' else stream
+    if fmt == 'xml' and mode == 'r':
+        return open(path, 'rb')
+    # utf-8-sig skips the byte order mark spreadsheet programs put in CSV files
+    return open(path, mode, encoding='utf-8-sig' if mode == 'r' else 'utf-8', newline='')
+
+
+def _print_progress(rows, seconds):
+    print(f"⏳ {rows:,} rows ({rows / max(seconds, 1e-9):,.0f} rows/s)", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="cli_password_generator.py",
+        description="Move saved passwords in and out of the vault")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help='Add the passwords in a file to the vault')
+    import_parser.add_argument('file', help="File to read ('-' for stdin)")
+    import_parser.add_argument('--rescore', action='store_true',
+                               help='Rate every imported password and report the strength levels')
+    import_parser.add_argument('--min-strength', choices=tuple(STRENGTH_BITS), default=None,
+                               help='Skip passwords rated below this level (implies --rescore)')
+    export_parser = commands.add_parser('export', help='Write every saved password to a file')
+    export_parser.add_argument('file', help="File to write ('-' for stdout)")
+    for command in (import_parser, export_parser):
+        command.add_argument('--format', choices=FORMATS, default=None,
+                             help='File format (default: from the file extension)')
+        command.add_argument('--vault', type=str, default=None,
+                             help='Vault file to use (default: cli_saved_passwords.jsonl)')
+        command.add_argument('--quiet', '-q', action='store_true',
+                             help='Do not report rows/sec progress')
+    import_parser.add_argument('--encrypt', action='store_true',
+                               help='Encrypt the vault with a master password')
+    args = parser.parse_args(argv)
+
+    try:
+        fmt = detect_format(args.file, args.format)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return 1
+    progress = None if args.quiet else _print_progress
+
+    generator = PasswordCore(args.vault)
+    if getattr(args, 'encrypt', False) or is_encrypted(generator.saved_passwords_file):
+        generator.master_password = read_master_password
+    vault = generator.vault
+    if vault is None:
+        print("❌ Error: The vault could not be opened!")
+        return 1
+
+    f = None
+    try:
+        f = _open(args.file, 'r' if args.command == 'import' else 'w', fmt)
+        if args.command == 'export':
+            start = time.perf_counter()
+            count = export_records(vault, f, fmt, progress)
+            seconds = time.perf_counter() - start
+            # Keep the summary out of the data when exporting to stdout
+            print(f"✅ Exported {count:,} passwords to {args.file} in {seconds:.1f} s "
+                  f"({count / max(seconds, 1e-9):,.0f} rows/s)",
+                  file=sys.stderr if args.file == '-' else sys.stdout)
+            return 0
+
+        stats = import_records(read_rows(f, fmt), vault, generator.dedupe_index,
+                               args.rescore, args.min_strength, progress=progress)
+    except (OSError, ValueError, KeyError, ElementTree.ParseError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+    finally:
+        if f is not None and args.file != '-':
+            f.close()
+
+    seconds = stats["seconds"]
+    print(f"✅ Imported {stats['imported']:,} of {stats['rows']:,} rows in {seconds:.1f} s "
+          f"({stats['rows'] / max(seconds, 1e-9):,.0f} rows/s)")
+    for name, label in (("duplicates", "already saved"), ("invalid", "without a password"),
+                        ("weak", f"rated below {args.min_strength}")):
+        if stats[name]:
+            print(f"⚠️ Skipped {stats[name]:,} {label}")
+    if "strength" in stats:
+        print("📊 Strength: " + ", ".join(f"{label} {count:,}"
+                                         for label, count in stats["strength"].items()))
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
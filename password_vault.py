@@ -0,0 +1,622 @@
+"""
+Password Vault Storage
+Append-only storage for saved passwords, shared by the CLI and GUI.
+
+Each saved password is one JSON line in the log, so saving is a single
+append instead of a rewrite of the whole file. The byte offset of every
+live record is indexed on demand, without parsing the records themselves.
+Removed records leave a tombstone line behind, and the log is compacted
+(rewritten atomically) once tombstones dominate it. A torn last line left
+by an interrupted write is ignored and cut off by the next append, so a
+crash can never lose earlier entries.
+
+An optional SQLite backend offers the same operations plus indexed
+searching and paging for very large vaults; open_vault picks the backend
+from the file extension. With a master password the log is encrypted
+record by record (see password_crypto), behind a header line holding the
+key derivation settings.
+"""
+
+import base64
+import bisect
+import itertools
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+import password_crypto
+
+# Compact once at least this many dead lines exist and they outnumber live ones
+COMPACT_MIN_DEAD = 1000
+
+TOMBSTONE_PREFIX = b'{"_deleted":'
+# First line of an encrypted log, holding its key derivation settings
+HEADER_PREFIX = b'{"_vault":'
+
+# Bytes read per step when looking back from the end of the log for a torn line
+TAIL_CHUNK = 4096
+
+
+def _encode(record):
+    return (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def make_record(password, description=""):
+    """Build a vault record for a password, timestamped now."""
+    return {
+        "password": password,
+        "description": description or "No description",
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "length": len(password)
+    }
+
+
+def record_matcher(search=None, since=None, until=None, min_length=None):
+    """Return a predicate selecting records by description text, timestamp range and length."""
+    search = search.lower() if search else None
+    return lambda r: ((not search or search in r['description'].lower())
+                      and (not since or r['timestamp'] >= since)
+                      and (not until or r['timestamp'] <= until)
+                      and (min_length is None or r['length'] >= min_length))
+
+
+def filter_records(records, search=None, since=None, until=None, min_length=None,
+                   limit=None, offset=0):
+    """Lazily filter and page an iterable of records in a single streaming pass."""
+    matched = filter(record_matcher(search, since, until, min_length), records)
+    stop = None if limit is None else offset + limit
+    return itertools.islice(matched, offset, stop)
+
+
+class RecordView:
+    """A filtered, sorted view of in-memory records, read a window at a time.
+
+    List widgets use it to draw only the rows in view. The view keeps the
+    positions of matching records ordered by the sort key, so reading a
+    window is a slice, and appending a record is a binary search rather than
+    a re-sort.
+    """
+
+    SORT_KEYS = {
+        None: None,  # save order
+        'description': lambda r: r['description'].lower(),
+        'timestamp': lambda r: r['timestamp'],
+        'length': lambda r: r['length'],
+    }
+
+    def __init__(self, records=()):
+        self.records = list(records)  # every record, in save order
+        self.sort_key = None
+        self.reverse = False
+        self._matches = record_matcher()
+        self._refresh()
+
+    def _refresh(self):
+        records, key = self.records, self.SORT_KEYS[self.sort_key]
+        order = [i for i, r in enumerate(records) if self._matches(r)]
+        keys = None
+        if key:
+            # A stable sort keeps records with equal keys in save order
+            order.sort(key=lambda i: key(records[i]))
+            keys = [key(records[i]) for i in order]
+        self._order, self._keys = order, keys
+
+    def set_filter(self, search=None, since=None, until=None, min_length=None):
+        self._matches = record_matcher(search, since, until, min_length)
+        self._refresh()
+
+    def sort_by(self, key=None, reverse=False):
+        if key not in self.SORT_KEYS:
+            raise ValueError(f"Cannot sort by {key}!")
+        self.sort_key, self.reverse = key, reverse
+        self._refresh()
+
+    def __len__(self):
+        return len(self._order)
+
+    def window(self, start, count):
+        """Return up to `count` records from position `start` of the view."""
+        start = max(0, min(start, len(self._order)))
+        if self.reverse:
+            stop = len(self._order) - start
+            positions = self._order[max(0, stop - count):stop][::-1]
+        else:
+            positions = self._order[start:start + count]
+        return [self.records[i] for i in positions]
+
+    def append(self, record):
+        """Add a record, placing it in the view if it matches the filter."""
+        self.records.append(record)
+        i = len(self.records) - 1
+        if not self._matches(record):
+            return
+        if self._keys is None:
+            self._order.append(i)
+        else:
+            key = self.SORT_KEYS[self.sort_key](record)
+            at = bisect.bisect_right(self._keys, key)
+            self._keys.insert(at, key)
+            self._order.insert(at, i)
+
+    def reset(self, records=()):
+        """Replace every record, keeping the filter and sort order."""
+        self.records = list(records)
+        self._refresh()
+
+
+class JsonlVault:
+    """Saved passwords stored as an append-only JSON Lines log.
+
+    Nothing is read from disk until it is needed. Iterating streams records
+    straight from the file in constant memory; the per-record offset index
+    is only built for positional access (indexing and removal).
+    """
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.scanned = False  # removed/dead/end/torn/count are up to date
+        self.offsets = None   # offsets of live records, built on demand
+        self.count = 0        # number of live records
+        self.removed = set()  # offsets of records hidden by a tombstone
+        self.dead = 0         # tombstones plus the records they remove
+        self.end = 0          # offset just past the last complete line
+        self.torn = False     # file has a partial line after `end`
+
+        if (not os.path.exists(self.path) and self.legacy_path
+                and os.path.exists(self.legacy_path)):
+            self._migrate_legacy()
+
+    def _encode_record(self, record):
+        return _encode(record)
+
+    def _decode_record(self, line):
+        return json.loads(line)
+
+    def _header(self):
+        """Bytes every rewritten log starts with (none for a plain log)."""
+        return b''
+
+    @staticmethod
+    def _is_record(line):
+        return (line.strip() and not line.startswith(TOMBSTONE_PREFIX)
+                and not line.startswith(HEADER_PREFIX))
+
+    def _lines(self):
+        """Yield (offset, line) for every complete line in the log."""
+        pos = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                yield pos, line
+                pos += len(line)
+
+    def _tail(self):
+        """Return (file size, offset just past the last complete line), reading back from the end."""
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if not size:
+            return 0, 0
+        with open(self.path, 'rb') as f:
+            pos = size
+            while pos > 0:
+                start = max(0, pos - TAIL_CHUNK)
+                f.seek(start)
+                newline = f.read(pos - start).rfind(b'\n')
+                if newline >= 0:
+                    return size, start + newline + 1
+                pos = start
+        return size, 0
+
+    def _scan(self, index=False):
+        """Find tombstones and the end of the log, optionally indexing record offsets."""
+        if self.scanned and (self.offsets is not None or not index):
+            return
+        removed = set()
+        offsets = [] if index else None
+        count = dead = end = 0
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size:
+            for pos, line in self._lines():
+                if line.startswith(TOMBSTONE_PREFIX):
+                    removed.add(json.loads(line)['_deleted'])
+                    dead += 2
+                elif self._is_record(line):
+                    count += 1
+                    if index:
+                        offsets.append(pos)
+                end = pos + len(line)
+        if index and removed:
+            offsets = [offset for offset in offsets if offset not in removed]
+        self.offsets = offsets
+        self.count = count - len(removed)
+        self.removed = removed
+        self.dead = dead
+        self.end = end
+        self.torn = size > end
+        self.scanned = True
+
+    def _migrate_legacy(self):
+        """Convert a pre-existing JSON array vault into the log format."""
+        with open(self.legacy_path, 'r') as f:
+            records = json.load(f)
+        self.rewrite(records)
+
+    def __len__(self):
+        self._scan()
+        return self.count
+
+    def __iter__(self):
+        """Stream live records from disk in save order, in constant memory."""
+        if not os.path.exists(self.path):
+            return
+        self._scan()
+        for pos, line in self._lines():
+            if pos >= self.end:
+                break
+            if pos not in self.removed and self._is_record(line):
+                yield self._decode_record(line)
+
+    def __getitem__(self, index):
+        """Read a single record by position using the offset index."""
+        self._scan(index=True)
+        with open(self.path, 'rb') as f:
+            f.seek(self.offsets[index])
+            return self._decode_record(f.readline())
+
+    def query(self, search=None, since=None, until=None, min_length=None,
+              limit=None, offset=0):
+        """Yield records matching the filters, streaming through the log."""
+        return filter_records(self, search, since, until, min_length, limit, offset)
+
+    def append(self, record):
+        """Append one record in O(1)."""
+        self.append_many([record])
+
+    def append_many(self, records):
+        """Append several records with a single write."""
+        lines = [self._encode_record(record) for record in records]
+        if not lines:
+            return
+        if self.scanned:
+            end, torn = self.end, self.torn
+        else:
+            # Appending only needs the tail of the log, so the full scan stays lazy
+            size, end = self._tail()
+            torn = size > end
+        if torn:
+            with open(self.path, 'r+b') as f:
+                f.truncate(end)
+            self.torn = False
+        with open(self.path, 'ab') as f:
+            pos = f.tell()
+            f.write(b''.join(lines))
+        if not self.scanned:
+            return
+        for line in lines:
+            if self.offsets is not None:
+                self.offsets.append(pos)
+            pos += len(line)
+        self.count += len(lines)
+        self.end = pos
+
+    def remove(self, index):
+        """Remove a record by position, leaving a tombstone in the log."""
+        self._scan(index=True)
+        offset = self.offsets.pop(index)
+        self.removed.add(offset)
+        with open(self.path, 'ab') as f:
+            f.write(_encode({'_deleted': offset}))
+            self.end = f.tell()
+        self.count -= 1
+        self.dead += 2
+        if self.dead >= COMPACT_MIN_DEAD and self.dead > self.count:
+            self.compact()
+
+    def clear(self):
+        """Remove every record."""
+        header = self._header()
+        with open(self.path, 'wb') as f:
+            f.write(header)
+        self.scanned = True
+        self.offsets = []
+        self.count = 0
+        self.removed = set()
+        self.dead = 0
+        self.end = len(header)
+        self.torn = False
+
+    def compact(self):
+        """Rewrite the log with only live records, dropping tombstones."""
+        self.rewrite(iter(self))
+
+    def rewrite(self, records):
+        """Atomically replace the whole log with `records`."""
+        tmp_path = self.path + '.tmp'
+        count = 0
+        with open(tmp_path, 'wb') as f:
+            f.write(self._header())
+            for record in records:
+                f.write(self._encode_record(record))
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+            end = f.tell()
+        os.replace(tmp_path, self.path)
+        self.scanned = True
+        self.offsets = None
+        self.count = count
+        self.removed = set()
+        self.dead = 0
+        self.end = end
+        self.torn = False
+
+
+class EncryptedJsonlVault(JsonlVault):
+    """A JSON Lines log whose records are each encrypted under a master password.
+
+    The key is derived once when the vault is opened (and cached for the
+    session), so saving and reading cost one seal or open per record. A
+    plaintext log already at `path` is encrypted in place on first open.
+    When a legacy JSON vault is migrated into it, or a plaintext log is
+    encrypted, the legacy file is deleted so no plaintext copy is left
+    behind, but only once every password in it is known to be in the
+    vault; `legacy_removed` tells whether that happened.
+    """
+
+    def __init__(self, path, master_password, legacy_path=None, kdf=password_crypto.DEFAULT_KDF):
+        settings = read_header(path)
+        plaintext = settings is None and os.path.exists(path) and os.path.getsize(path) > 0
+        if settings is None:
+            settings = password_crypto.new_kdf_params(kdf)
+        self.settings = settings
+        self.cipher = password_crypto.RecordCipher(password_crypto.derive_key(master_password, settings))
+        if 'check' in settings and not self.cipher.verify(settings['check']):
+            raise ValueError("Wrong master password!")
+        migrating = (not os.path.exists(path) and legacy_path is not None
+                     and os.path.exists(legacy_path))
+        super().__init__(path, legacy_path)
+        if plaintext:
+            self.rewrite(JsonlVault(path))
+        # A legacy file whose passwords are all in the vault is only a plaintext copy of them
+        self.legacy_removed = False
+        if ((migrating or plaintext) and legacy_path and os.path.exists(legacy_path)
+                and self._holds_all(legacy_path)):
+            os.remove(legacy_path)
+            self.legacy_removed = True
+
+    def _holds_all(self, legacy_path):
+        """Is every password of a legacy JSON vault also in this vault?"""
+        try:
+            with open(legacy_path, 'r') as f:
+                missing = {record['password'] for record in json.load(f)}
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        for record in self:
+            if not missing:
+                break
+            missing.discard(record['password'])
+        return not missing
+
+    def _encode_record(self, record):
+        plaintext = json.dumps(record, separators=(',', ':')).encode('utf-8')
+        return base64.b64encode(self.cipher.seal(plaintext)) + b'\n'
+
+    def _decode_record(self, line):
+        return json.loads(self.cipher.open(base64.b64decode(line)))
+
+    def _header(self):
+        header = dict(_vault='encrypted', **self.settings)
+        header['check'] = self.cipher.check_value()
+        return _encode(header)
+
+    def append_many(self, records):
+        """Append several encrypted records with a single write."""
+        if not os.path.exists(self.path) or not os.path.getsize(self.path):
+            self.clear()  # a new log starts with its header
+        super().append_many(records)
+
+
+class SqliteVault:
+    """Saved passwords stored in an indexed SQLite database.
+
+    Description search uses an FTS5 trigram index, so substring matches are
+    found without scanning the table. Terms shorter than three characters
+    or containing LIKE wildcards (% and _), and SQLite builds without the
+    trigram tokenizer, fall back to a LIKE scan of the table.
+    """
+
+    FIELDS = ('password', 'description', 'timestamp', 'length')
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        is_new = not os.path.exists(self.path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS passwords (
+                id INTEGER PRIMARY KEY,
+                password TEXT NOT NULL,
+                description TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                length INTEGER NOT NULL
+            );
+            -- Substring search cannot use a plain index; passwords_fts serves it instead
+            DROP INDEX IF EXISTS idx_passwords_description;
+            CREATE INDEX IF NOT EXISTS idx_passwords_timestamp ON passwords (timestamp);
+            CREATE INDEX IF NOT EXISTS idx_passwords_length ON passwords (length);
+        """)
+        self.fts = self._create_search_index()
+        if is_new and self.legacy_path and os.path.exists(self.legacy_path):
+            with open(self.legacy_path, 'r') as f:
+                self.append_many(json.load(f))
+
+    def _create_search_index(self):
+        """Create the description trigram index if needed; returns whether it is available."""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'passwords_fts'").fetchone()
+        try:
+            with self.conn:
+                # Only the trigrams are stored (detail=none); the text stays in `passwords`
+                self.conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS passwords_fts USING fts5(description, "
+                    "content='passwords', content_rowid='id', tokenize='trigram', detail=none)")
+                if not exists:
+                    # Index the records of a database created before the index existed
+                    self.conn.execute("INSERT INTO passwords_fts (passwords_fts) VALUES ('rebuild')")
+        except sqlite3.OperationalError:
+            return False  # no FTS5, or no trigram tokenizer (SQLite < 3.34)
+        return True
+
+    def _rows(self, sql, params=(), prefix=''):
+        columns = ', '.join(prefix + field for field in self.FIELDS)
+        for row in self.conn.execute(sql.format(columns=columns), params):
+            yield dict(zip(self.FIELDS, row))
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM passwords").fetchone()[0]
+
+    def __iter__(self):
+        """Stream records from the database in save order."""
+        return self._rows("SELECT {columns} FROM passwords ORDER BY id")
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        rows = list(self._rows(
+            "SELECT {columns} FROM passwords ORDER BY id LIMIT 1 OFFSET ?", (index,)))
+        if index < 0 or not rows:
+            raise IndexError("vault index out of range")
+        return rows[0]
+
+    def append(self, record):
+        """Insert one record."""
+        self.append_many([record])
+
+    def append_many(self, records):
+        """Insert several records in a single transaction."""
+        rows = ((r['password'], r['description'], r['timestamp'], r['length'])
+                for r in records)
+        with self.conn:
+            last_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM passwords").fetchone()[0]
+            self.conn.executemany(
+                "INSERT INTO passwords (password, description, timestamp, length) "
+                "VALUES (?, ?, ?, ?)", rows)
+            if self.fts:
+                # One statement indexes the whole batch, several times faster than a per-row trigger
+                self.conn.execute(
+                    "INSERT INTO passwords_fts (rowid, description) "
+                    "SELECT id, description FROM passwords WHERE id > ?", (last_id,))
+
+    def remove(self, index):
+        """Remove a record by position."""
+        if index < 0:
+            index += len(self)
+        row = self.conn.execute(
+            "SELECT id FROM passwords ORDER BY id LIMIT 1 OFFSET ?",
+            (max(index, 0),)).fetchone()
+        if index < 0 or row is None:
+            raise IndexError("vault index out of range")
+        with self.conn:
+            if self.fts:
+                self.conn.execute(
+                    "INSERT INTO passwords_fts (passwords_fts, rowid, description) "
+                    "SELECT 'delete', id, description FROM passwords WHERE id = ?", row)
+            self.conn.execute("DELETE FROM passwords WHERE id = ?", row)
+
+    def clear(self):
+        """Remove every record."""
+        with self.conn:
+            self._delete_all()
+
+    def _delete_all(self):
+        if self.fts:
+            self.conn.execute("INSERT INTO passwords_fts (passwords_fts) VALUES ('delete-all')")
+        self.conn.execute("DELETE FROM passwords")
+
+    def compact(self):
+        """Reclaim space left by removed records."""
+        self.conn.execute("VACUUM")
+
+    def rewrite(self, records):
+        """Replace every record with `records` in one transaction."""
+        with self.conn:
+            self._delete_all()
+            self.append_many(records)
+
+    def query(self, search=None, since=None, until=None, min_length=None,
+              limit=None, offset=0):
+        """Yield records matching the filters, using the table and search indexes."""
+        source = "passwords p"
+        order = "p.id"
+        clauses = []
+        params = []
+        if search and self.fts and len(search) >= 3 and not any(c in search for c in '%_'):
+            # The trigram index answers case-insensitive substring LIKEs, and walking it
+            # in rowid order lets LIMIT stop early however many records match
+            source = "passwords_fts f JOIN passwords p ON p.id = f.rowid"
+            order = "f.rowid"
+            clauses.append("f.description LIKE ?")
+            params.append(f"%{search}%")
+        elif search:
+            clauses.append("p.description LIKE ? ESCAPE '\\'")
+            escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f"%{escaped}%")
+        if since:
+            clauses.append("p.timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("p.timestamp <= ?")
+            params.append(until)
+        if min_length is not None:
+            clauses.append("p.length >= ?")
+            params.append(min_length)
+
+        sql = f"SELECT {{columns}} FROM {source}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order} LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit, offset]
+        return self._rows(sql, params, prefix='p.')
+
+    def close(self):
+        self.conn.close()
+
+
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+
+def read_header(path):
+    """Return the key derivation settings of an encrypted log, or None if `path` is not one."""
+    try:
+        with open(path, 'rb') as f:
+            line = f.readline()
+    except OSError:
+        return None
+    if not line.startswith(HEADER_PREFIX) or not line.endswith(b'\n'):
+        return None
+    header = json.loads(line)
+    header.pop('_vault')
+    return header
+
+
+def is_encrypted(path):
+    return read_header(path) is not None
+
+
+def open_vault(path, legacy_path=None, master_password=None):
+    """Open the vault at `path`, using SQLite for .db/.sqlite files and JSON Lines otherwise.
+
+    With a master password the JSON Lines log is encrypted (a plaintext one
+    is converted); an encrypted log cannot be opened without one.
+    """
+    if path.lower().endswith(SQLITE_EXTENSIONS):
+        if master_password is not None:
+            raise ValueError("Encrypted vaults must be JSON Lines files, not SQLite databases!")
+        return SqliteVault(path, legacy_path)
+    if master_password is not None:
+        return EncryptedJsonlVault(path, master_password, legacy_path)
+    if is_encrypted(path):
+        raise ValueError("This vault is encrypted; a master password is required!")
+    return JsonlVault(path, legacy_path)
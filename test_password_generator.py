@@ -100,6 +100,918 @@ def test_cli_import():
         print(f"❌ CLI module import failed: {e}")
         return False
 
+def test_cli_batch_generation():
+    """Test that batch generation yields the requested number of passwords."""
+    from cli_password_generator import CLIPasswordGenerator
+    generator = CLIPasswordGenerator()
+    
+    passwords = list(generator.generate_many(5, length=12, symbols=False))
+    assert len(passwords) == 5
+    assert all(len(p) == 12 for p in passwords)
+    assert all(p.isalnum() for p in passwords)
+    
+    try:
+        list(generator.generate_many(0))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("count=0 should raise ValueError")
+
+def test_cli_fast_startup():
+    """Test that a single -l N password skips argparse, the vault and the breach filter."""
+    import os
+    import subprocess
+    import tempfile
+    import password_breach
+    import cli_password_generator
+
+    assert cli_password_generator.BREACH_FILTER_FILE == password_breach.DEFAULT_FILTER_FILE
+    script = ("import sys, cli_password_generator as cli; cli.main(['-l', '20', '--no-symbols']); "
+              "print(sorted(m for m in ('argparse', 'json', 'sqlite3', 'hashlib', 're') "
+              "if m in sys.modules))")
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(cli_password_generator.__file__)))
+        output = subprocess.run([sys.executable, '-c', script], cwd=tmp, env=env,
+                                capture_output=True, text=True, check=True).stdout.splitlines()
+        assert output[0].startswith("🔐 Generated Password: ")
+        assert len(output[0].split(": ")[1]) == 20
+        assert output[-1] == "[]"
+        assert os.listdir(tmp) == []
+
+def test_core_library():
+    """Test the headless core: no UI imports, and saving/clearing without printing."""
+    import contextlib
+    import io
+    import os
+    import subprocess
+    import tempfile
+    import password_core
+    from cli_password_generator import CLIPasswordGenerator
+
+    script = ("import sys, password_core; print(sorted(m for m in "
+              "('tkinter', 'pyperclip', 'argparse', 'json', 'sqlite3') if m in sys.modules))")
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(password_core.__file__)))
+    output = subprocess.run([sys.executable, '-c', script], env=env,
+                            capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
+    assert issubclass(CLIPasswordGenerator, password_core.PasswordCore)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        core = password_core.PasswordCore(os.path.join(tmp, 'vault.db'))
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            record = core.add_password("library-secret", "api")
+            assert core.add_password("library-secret") is None
+            assert [r["password"] for r in core.vault] == ["library-secret"]
+            assert core.clear_vault() == 1 and core.clear_vault() == 0
+            assert core.add_password("library-secret") is not None
+        assert record["description"] == "api" and out.getvalue() == ""
+
+        core = password_core.PasswordCore(os.path.join(tmp, 'locked.jsonl'), master_password="right")
+        core.add_password("x")
+        locked = password_core.PasswordCore(os.path.join(tmp, 'locked.jsonl'), master_password="wrong")
+        with contextlib.redirect_stderr(io.StringIO()):
+            try:
+                locked.add_password("y")
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("saving to a vault that cannot be opened should raise")
+        assert locked.vault_error is not None
+
+def test_engine_generation():
+    """Test the shared CSPRNG engine stays within the charset and covers all of it."""
+    import password_engine
+    
+    chars = "abcdefg"  # 256 % 7 != 0, so rejection sampling is exercised
+    passwords = password_engine.generate_passwords(chars, 50, 200)
+    assert len(passwords) == 200
+    assert all(len(p) == 50 for p in passwords)
+    assert set(''.join(passwords)) == set(chars)
+    
+    for bad in ("", "pässword"):
+        try:
+            password_engine.generate_password(bad, 8)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"charset {bad!r} should raise ValueError")
+
+def test_compiled_charset():
+    """Test charset compilation, exclusions and memoization."""
+    import password_engine
+    
+    charset = password_engine.compile_charset(symbols=False, exclude_similar=True,
+                                              include='_', exclude='xyz')
+    assert charset is password_engine.compile_charset(symbols=False, exclude_similar=True,
+                                                      include='_', exclude='xyz')
+    assert '_' in charset.chars
+    assert not set('l1IO0xyz') & set(charset.chars)
+    assert charset.limit % len(charset) == 0
+    assert len(charset.table) == 256
+    
+    # Duplicated characters must not bias the alphabet
+    assert password_engine.charset_from_chars('aab').chars == 'ab'
+    
+    password = charset.generate(32)
+    assert len(password) == 32 and set(password) <= set(charset.chars)
+
+def test_parallel_generation():
+    """Test that sharded generation across processes returns every password."""
+    import password_engine
+    
+    passwords = list(password_engine.generate_parallel("abc123", 10, 25, workers=2, chunk_size=7))
+    assert len(passwords) == 25
+    assert all(len(p) == 10 and set(p) <= set("abc123") for p in passwords)
+
+def test_vault_append_log():
+    """Test the append-only vault: appends, torn writes, removal and migration."""
+    import json
+    import os
+    import tempfile
+    from password_vault import JsonlVault
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'vault.jsonl')
+        vault = JsonlVault(path)
+        vault.append({"password": "a", "length": 1})
+        vault.append_many([{"password": "b", "length": 1}, {"password": "c", "length": 1}])
+        assert [r["password"] for r in vault] == ["a", "b", "c"]
+        assert vault[1]["password"] == "b"
+        
+        # Simulate a crash in the middle of writing a record
+        with open(path, 'ab') as f:
+            f.write(b'{"password": "tor')
+        vault = JsonlVault(path)
+        assert len(vault) == 3
+        vault.append({"password": "d", "length": 1})
+        assert [r["password"] for r in JsonlVault(path)] == ["a", "b", "c", "d"]
+        
+        vault.remove(0)
+        assert [r["password"] for r in JsonlVault(path)] == ["b", "c", "d"]
+        vault.compact()
+        assert [r["password"] for r in JsonlVault(path)] == ["b", "c", "d"]
+        
+        vault.clear()
+        assert len(JsonlVault(path)) == 0
+        
+        legacy = os.path.join(tmp, 'old.json')
+        with open(legacy, 'w') as f:
+            json.dump([{"password": "old", "length": 3}], f)
+        migrated = JsonlVault(os.path.join(tmp, 'new.jsonl'), legacy)
+        assert [r["password"] for r in migrated] == ["old"]
+
+def test_sqlite_vault():
+    """Test the SQLite vault backend and its indexed queries."""
+    import os
+    import tempfile
+    from password_vault import SqliteVault, open_vault
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        vault = open_vault(os.path.join(tmp, 'vault.db'))
+        assert isinstance(vault, SqliteVault)
+        vault.append_many([
+            {"password": "a" * 8, "description": "mail", "timestamp": "2025-01-01 00:00:00", "length": 8},
+            {"password": "b" * 20, "description": "bank", "timestamp": "2025-06-01 00:00:00", "length": 20},
+            {"password": "c" * 16, "description": "50% off", "timestamp": "2025-09-01 00:00:00", "length": 16},
+        ])
+        assert len(vault) == 3
+        assert vault[-1]["description"] == "50% off"
+        assert [r["description"] for r in vault.query(min_length=16)] == ["bank", "50% off"]
+        assert [r["description"] for r in vault.query(since="2025-05-01", until="2025-07-01")] == ["bank"]
+        assert [r["description"] for r in vault.query(search="%")] == ["50% off"]
+        assert [r["description"] for r in vault.query(limit=1, offset=1)] == ["bank"]
+        # Trigram search is case-insensitive and stays in step with removals
+        assert [r["description"] for r in vault.query(search="BAN")] == ["bank"]
+        assert [r["description"] for r in vault.query(search="ail", min_length=8)] == ["mail"]
+        
+        vault.remove(0)
+        assert list(vault.query(search="mail")) == []
+        assert [r["description"] for r in vault] == ["bank", "50% off"]
+        vault.clear()
+        assert len(vault) == 0
+        vault.close()
+
+def test_encrypted_vault():
+    """Test per-record vault encryption, the cached key and plaintext conversion."""
+    import json
+    import os
+    import tempfile
+    import password_crypto
+    from password_vault import JsonlVault, is_encrypted, make_record, open_vault
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'vault.jsonl')
+        JsonlVault(path).append(make_record("plain-secret", "old"))
+        vault = open_vault(path, master_password="correct horse")
+        vault.append(make_record("new-secret", "new"))
+        assert is_encrypted(path)
+        with open(path, 'rb') as f:
+            assert b"secret" not in f.read()
+        
+        reopened = open_vault(path, master_password="correct horse")
+        assert [r["password"] for r in reopened] == ["plain-secret", "new-secret"]
+        assert reopened[1]["description"] == "new"
+        assert password_crypto._derive.cache_info().hits >= 1
+        
+        for master_password in ("wrong", None):
+            try:
+                open_vault(path, master_password=master_password)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"master password {master_password!r} should be rejected")
+        
+        # A modified record must fail authentication rather than decrypt to garbage
+        with open(path, 'rb') as f:
+            lines = f.read().split(b'\n')
+        lines[1] = lines[1][:8] + (b'A' if lines[1][8:9] != b'A' else b'B') + lines[1][9:]
+        with open(path, 'wb') as f:
+            f.write(b'\n'.join(lines))
+        try:
+            list(open_vault(path, master_password="correct horse"))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("tampered record should fail authentication")
+        
+        # Migrating a legacy JSON vault into an encrypted one leaves no plaintext copy
+        legacy = os.path.join(tmp, 'legacy.json')
+        with open(legacy, 'w') as f:
+            json.dump([make_record("legacy-secret", "old")], f)
+        path = os.path.join(tmp, 'migrated.jsonl')
+        vault = open_vault(path, legacy, master_password="correct horse")
+        assert vault.legacy_removed and not os.path.exists(legacy)
+        assert [r["password"] for r in vault] == ["legacy-secret"]
+        
+        # A legacy file with passwords the log never received is kept
+        with open(legacy, 'w') as f:
+            json.dump([make_record("only-in-legacy", "old")], f)
+        path = os.path.join(tmp, 'existing.jsonl')
+        JsonlVault(path).append(make_record("plain-secret", "old"))
+        vault = open_vault(path, legacy, master_password="correct horse")
+        assert not vault.legacy_removed and os.path.exists(legacy)
+        assert is_encrypted(path) and [r["password"] for r in vault] == ["plain-secret"]
+
+def test_dedupe_index():
+    """Test duplicate rejection on save, index rebuilds and --unique batches."""
+    import contextlib
+    import io
+    import os
+    import tempfile
+    import cli_password_generator
+    from cli_password_generator import CLIPasswordGenerator
+    from password_dedupe import INDEX_SUFFIX, FingerprintSet
+    from password_vault import make_record, open_vault
+
+    seen = FingerprintSet(os.urandom(32))
+    assert all(seen.add_password(f"pw{i}") for i in range(5000))
+    assert len(seen) == 5000 and seen.contains_password("pw42")
+    assert not seen.add_password("pw42") and not seen.contains_password("pw5000")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ('vault.jsonl', 'vault.db'):
+            path = os.path.join(tmp, name)
+            generator = CLIPasswordGenerator(path)
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                generator.save_password("same", "first")
+                generator.save_password("same", "second")
+            assert "already saved" in out.getvalue()
+            assert len(generator.vault) == 1
+            assert os.path.exists(path + INDEX_SUFFIX)
+
+            # A change made without the index is picked up by a rebuild
+            open_vault(path).append(make_record("other", "outside"))
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                CLIPasswordGenerator(path).save_password("other")
+            assert "already saved" in out.getvalue()
+
+        # 900 of the 1000 three-digit passwords, none repeated or already saved
+        path = os.path.join(tmp, 'vault.jsonl')
+        with contextlib.redirect_stdout(io.StringIO()):
+            CLIPasswordGenerator(path).save_password("123")
+        output = os.path.join(tmp, 'out.txt')
+        assert cli_password_generator.main([
+            '-c', '900', '-l', '3', '--no-uppercase', '--no-lowercase', '--no-symbols',
+            '--unique', '--vault', path, '-o', output]) == 0
+        with open(output) as f:
+            passwords = f.read().split()
+        assert len(passwords) == len(set(passwords)) == 900
+        assert "123" not in passwords
+
+def test_import_export():
+    """Test round trips through CSV, JSON Lines and KeePass XML, and import skips."""
+    import contextlib
+    import io
+    import os
+    import tempfile
+    import cli_password_generator
+    import password_transfer
+    from password_vault import open_vault
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'source.jsonl')
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator = cli_password_generator.CLIPasswordGenerator(source)
+            generator.save_password("Tr0ub4dor&3-long-enough", 'bank <main> & "co"')
+            generator.save_password("weak", "old")
+        saved = list(open_vault(source))
+
+        for fmt in password_transfer.FORMATS:
+            path = os.path.join(tmp, f'export.{fmt}')
+            target = os.path.join(tmp, f'{fmt}.db')
+            with contextlib.redirect_stdout(io.StringIO()):
+                assert cli_password_generator.main(['export', path, '--vault', source, '-q']) == 0
+                assert cli_password_generator.main(['import', path, '--vault', target, '-q']) == 0
+            assert list(open_vault(target)) == saved
+
+            # A second import finds everything already saved
+            with password_transfer._open(path, 'r', fmt) as f:
+                stats = password_transfer.import_records(
+                    password_transfer.read_rows(f, fmt), open_vault(target),
+                    cli_password_generator.CLIPasswordGenerator(target).dedupe_index)
+            assert stats["rows"] == 2 and stats["duplicates"] == 2 and stats["imported"] == 0
+
+    # Other tools' column names, missing passwords, weak passwords and small batches
+    rows = password_transfer.read_rows(io.StringIO(
+        "Title,URL,Password,Created\n"
+        "mail,https://mail,abc,2024-05-01T10:00:00Z\n"
+        "blank,https://x,,\n"
+        "vpn,https://vpn,Kx9$mQ2!vL7#pR4@,2024-05-01 10:00:00\n"), 'csv')
+
+    class ListVault(list):
+        path = os.devnull
+        def append_many(self, records):
+            self.append(list(records))
+
+    vault = ListVault()
+    progress = []
+    stats = password_transfer.import_records(rows, vault, min_strength="Good", batch_size=1,
+                                             progress=lambda n, seconds: progress.append(n),
+                                             progress_every=1)
+    assert (stats["imported"], stats["invalid"], stats["weak"]) == (1, 1, 1)
+    assert stats["strength"]["Strong"] == 1 and progress == [1, 2, 3]
+    assert vault[0][0]["description"] == "vpn" and vault[0][0]["timestamp"] == "2024-05-01 10:00:00"
+    
+    # JSON values that are not strings are stored as text, so searching the vault still works
+    rows = password_transfer.read_rows(io.StringIO(
+        '{"password": "abc12345", "description": 5, "timestamp": 7}\n'
+        '{"password": "def12345", "description": {"a": 1}, "created": null}\n'), 'jsonl')
+    records = [password_transfer.to_record(row) for row in rows]
+    assert [r["description"] for r in records] == ["5", "No description"]
+    assert all(isinstance(r["timestamp"], str) and len(r["timestamp"]) == 19 for r in records)
+
+def test_cli_list_filters():
+    """Test filtered, paged listing in each output format."""
+    import csv
+    import io
+    import json
+    import os
+    import tempfile
+    from cli_password_generator import CLIPasswordGenerator
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        generator = CLIPasswordGenerator(os.path.join(tmp, 'vault.jsonl'))
+        generator.vault.append_many([
+            {"password": "p" * n, "description": f"site {n}", "timestamp": f"2025-01-{n:02d} 12:00:00", "length": n}
+            for n in range(1, 21)
+        ])
+        
+        out = io.StringIO()
+        generator.list_saved_passwords(min_length=10, since="2025-01-12", limit=3, offset=1,
+                                       fmt='json', out=out)
+        assert [r["length"] for r in json.loads(out.getvalue())] == [13, 14, 15]
+        
+        out = io.StringIO()
+        generator.list_saved_passwords(search="SITE 2", fmt='csv', out=out)
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        assert [r["description"] for r in rows] == ["site 2", "site 20"]
+        
+        out = io.StringIO()
+        generator.list_saved_passwords(search="nothing", fmt='json', out=out)
+        assert json.loads(out.getvalue()) == []
+        
+        out = io.StringIO()
+        generator.list_saved_passwords(search="nothing", out=out)
+        assert "No saved passwords found" in out.getvalue()
+        
+        # Negative paging options are rejected before the vault is read
+        import contextlib
+        import cli_password_generator
+        for option in ('--limit', '--offset'):
+            with contextlib.redirect_stderr(io.StringIO()) as err:
+                try:
+                    cli_password_generator.main(['--list', option, '-1'])
+                except SystemExit as e:
+                    assert e.code == 2
+                else:
+                    raise AssertionError(f"{option} -1 should be rejected")
+            assert "must be 0 or more" in err.getvalue()
+
+def test_output_formats():
+    """Test generated-password output in each format, with strength and entropy columns."""
+    import contextlib
+    import csv
+    import io
+    import json
+    import os
+    import tempfile
+    import cli_password_generator
+    from cli_password_generator import PasswordWriter
+
+    def run(*argv):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            assert cli_password_generator.main(list(argv)) == 0
+        return out.getvalue()
+
+    # 16 characters from 26 letters and 4 quoting-sensitive symbols: log2(30) * 16 bits
+    options = ['-l', '16', '--no-uppercase', '--no-numbers', '--no-symbols', '--include-chars', ',"\\\n']
+    rows = json.loads(run('-c', '50', '--format', 'json', '--with-strength', '--with-entropy', *options))
+    assert len(rows) == 50 and all(len(r["password"]) == 16 for r in rows)
+    assert {(r["strength"], r["entropy"]) for r in rows} == {("Good", 78.5)}
+
+    lines = run('-c', '50', '--format', 'jsonl', '--with-entropy', *options).splitlines()
+    assert [len(json.loads(line)["password"]) for line in lines] == [16] * 50
+
+    rows = list(csv.reader(io.StringIO(run('-c', '50', '--format', 'csv', '--with-strength', *options))))
+    assert rows[0] == ['password', 'strength'] and len(rows) == 51
+    assert all(len(password) == 16 and strength == "Good" for password, strength in rows[1:])
+
+    assert len(run('-c', '5', '-l', '12').split()) == 5
+    assert len(json.loads(run('-l', '12', '--format', 'json'))[0]["password"]) == 12
+    
+    # Saving a password does not mix status messages into structured output
+    with tempfile.TemporaryDirectory() as tmp:
+        vault = os.path.join(tmp, 'vault.jsonl')
+        [row] = json.loads(run('-l', '12', '--format', 'json', '--save', '--vault', vault))
+        assert len(row["password"]) == 12
+
+    # Empty JSON output is still a valid array
+    out = io.StringIO()
+    PasswordWriter(out, 'json').close()
+    assert json.loads(out.getvalue()) == []
+
+def test_record_view():
+    """Test the windowed, sorted and filtered record view behind the GUI list."""
+    from password_vault import RecordView
+    
+    records = [{"password": "x" * n, "description": d, "timestamp": t, "length": n}
+               for n, d, t in ((8, "Bank", "2025-03-01 10:00:00"), (20, "email", "2025-01-01 10:00:00"),
+                               (12, "bank card", "2025-02-01 10:00:00"))]
+    view = RecordView(records)
+    assert len(view) == 3 and view.window(1, 5) == records[1:]
+    
+    view.sort_by('length', reverse=True)
+    assert [r["length"] for r in view.window(0, 3)] == [20, 12, 8]
+    view.sort_by('description')
+    assert [r["description"] for r in view.window(0, 3)] == ["Bank", "bank card", "email"]
+    
+    view.set_filter(search="bank", since="2025-02-01")
+    assert [r["length"] for r in view.window(0, 10)] == [8, 12]
+    
+    # Appends land in sorted position, and only if they match the filter
+    view.append({"password": "y", "description": "Bank 2", "timestamp": "2025-04-01 10:00:00", "length": 1})
+    view.append({"password": "z", "description": "other", "timestamp": "2025-04-01 10:00:00", "length": 1})
+    assert [r["description"] for r in view.window(0, 10)] == ["Bank", "Bank 2", "bank card"]
+    assert len(view.records) == 5
+    
+    view.reset()
+    assert len(view) == 0 and view.window(0, 10) == []
+
+def test_lazy_vault_loading():
+    """Test that the vault is only read when a command needs it."""
+    import os
+    import tempfile
+    from cli_password_generator import CLIPasswordGenerator
+    from password_vault import JsonlVault
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'vault.jsonl')
+        generator = CLIPasswordGenerator(path)
+        generator.generate_password(length=12)
+        assert not generator._vault_loaded
+        
+        generator.save_password("secret", "lazy")
+        assert generator._vault_loaded
+        
+        # Streaming reads never build the offset index
+        vault = JsonlVault(path)
+        assert [r["description"] for r in vault] == ["lazy"]
+        assert vault.offsets is None
+
+def test_entropy_strength():
+    """Test entropy-based strength scoring and the batch scorer."""
+    import math
+    import password_engine
+    import password_strength
+    from password_core import PasswordCore
+    
+    weak = password_strength.analyze("abc123")
+    assert weak.label == "Weak" and weak.score == 2
+    assert abs(weak.bits - 6 * math.log2(36)) < 1e-9
+    assert password_strength.analyze("MySecureP@ssw0rd!").label == "Strong"
+    assert password_strength.analyze("").bits == 0
+    
+    # A known charset gives the exact figure regardless of which characters appeared
+    charset = password_engine.compile_charset(symbols=False)
+    assert password_strength.estimate_entropy("aaaaaaaa", charset) == 8 * math.log2(62)
+    
+    results = list(password_strength.analyze_many(["abc123", "MySecureP@ssw0rd!"]))
+    assert [r.label for r in results] == ["Weak", "Strong"]
+    
+    # The generator keeps its (strength, score) contract; analyze_password adds the bits
+    core = PasswordCore()
+    strength, score = core.check_password_strength("abc123")
+    assert (strength, score) == ("Weak", 2)
+    assert core.analyze_password("abc123") == weak
+
+def test_breach_filter():
+    """Test building and querying the breached-password Bloom filter."""
+    import hashlib
+    import os
+    import tempfile
+    import password_breach
+    
+    breached = [f"leaked{i}" for i in range(500)]
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, 'corpus.txt')
+        with open(corpus, 'w') as f:
+            for pwd in breached:
+                f.write(hashlib.sha1(pwd.encode()).hexdigest().upper() + ":3\n")
+                
+        filter_path = os.path.join(tmp, 'breach.bloom')
+        assert password_breach.build_filter(corpus, filter_path, false_positive_rate=0.001) == 500
+        
+        with password_breach.BreachChecker(filter_path) as checker:
+            assert all(checker.is_breached(pwd) for pwd in breached)
+            false_positives = sum(checker.is_breached(f"fresh{i}") for i in range(2000))
+            assert false_positives < 20
+            
+        from cli_password_generator import CLIPasswordGenerator
+        generator = CLIPasswordGenerator(os.path.join(tmp, 'vault.jsonl'), filter_path)
+        assert generator.is_breached("leaked7")
+        assert not generator.is_breached("Zq8!rT2#")
+
+def test_passphrase_generation():
+    """Test the compiled wordlist index and passphrase options."""
+    import math
+    import os
+    import tempfile
+    import password_passphrase
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        wordlist_path = os.path.join(tmp, 'words.txt')
+        with open(wordlist_path, 'w') as f:
+            f.write("# EFF-style list\n")
+            f.writelines(f"{11111 + i}\tword{i}\n" for i in range(16))
+            f.write("11111\tword0\n")  # duplicates are dropped
+            
+        wordlist = password_passphrase.open_wordlist(wordlist_path)
+        assert os.path.exists(wordlist_path + '.idx')
+        assert len(wordlist) == 16 and wordlist[3] == "word3"
+        assert password_passphrase.passphrase_entropy(wordlist, 5) == 20
+        assert password_passphrase.passphrase_entropy(wordlist, 4, digits=2) == 16 + 2 * math.log2(10) + 2
+        
+        phrases = password_passphrase.generate_passphrases(wordlist, 4, 50, separator='.',
+                                                           capitalize=True, digits=2)
+        for phrase in phrases:
+            parts = phrase.split('.')
+            assert len(parts) == 4 and all(p.startswith("Word") for p in parts)
+            assert sum(p[-2:].isdigit() and len(p) > 6 for p in parts) >= 1
+        
+        # Bulk path decodes the whole list once
+        assert len(password_passphrase.generate_passphrases(wordlist, 6, 500)) == 500
+        
+        # Without a wordlist, --words is a usage error rather than a failed generation
+        import contextlib
+        import io
+        import cli_password_generator
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            if password_passphrase.default_wordlist() is None:
+                with contextlib.redirect_stderr(io.StringIO()) as err:
+                    try:
+                        cli_password_generator.main(['--words', '4'])
+                    except SystemExit as e:
+                        assert e.code == 2
+                assert "--words needs --wordlist" in err.getvalue()
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                cli_password_generator.main(['--words', '4', '--wordlist', wordlist_path])
+            assert "Generated Passphrase: word" in out.getvalue()
+        finally:
+            os.chdir(cwd)
+        wordlist.close()
+
+def test_password_policy():
+    """Test that policy generation meets every requirement without retries."""
+    import password_engine
+    from password_policy import PasswordPolicy, generate_passwords
+    
+    policy = PasswordPolicy(min_upper=2, min_lower=2, min_digits=3, min_symbols=2,
+                            max_consecutive=1, forbidden=["abc", "123"])
+    charset = password_engine.compile_charset()
+    for password in generate_passwords(charset, 12, 200, policy):
+        assert len(password) == 12
+        assert policy.violations(password) == []
+        
+    # A two-letter alphabet can still honour a repeat limit
+    strict = PasswordPolicy(max_consecutive=2)
+    assert all(strict.is_valid(p) for p in generate_passwords("ab", 40, 50, strict))
+    
+    assert PasswordPolicy(min_digits=2).violations("abc1") == ["needs at least 2 digits"]
+    for bad_length, bad_chars in ((3, charset), (12, "abcdef")):
+        try:
+            generate_passwords(bad_chars, bad_length, 1, policy)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("an unsatisfiable policy should raise ValueError")
+
+def test_http_service():
+    """Test the HTTP service over a real keep-alive connection."""
+    import asyncio
+    import json
+    import os
+    import tempfile
+    import threading
+    import password_server
+    
+    async def exchange(port, requests):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        responses = []
+        for method, path, payload in requests:
+            body = json.dumps(payload).encode() if payload is not None else b''
+            writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                         f"Content-Type: application/json\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            status = int((await reader.readline()).split()[1])
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line == b'\r\n':
+                    break
+                name, _, value = line.decode().partition(':')
+                headers[name.lower()] = value.strip()
+            responses.append((status, json.loads(await reader.readexactly(int(headers['content-length'])))))
+        writer.close()
+        return responses
+        
+    async def raw_status(port, request):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(request)
+        status = int((await reader.readline()).split()[1])
+        writer.close()
+        return status
+        
+    class SlowService(password_server.PasswordService):
+        """Generation waits until a strength request has been answered."""
+        answered = threading.Event()
+        
+        def generate(self, params):
+            self.answered.wait(5)
+            return super().generate(params)
+            
+    async def run_concurrent(port):
+        # A slow request on one connection must not hold up another connection
+        order = []
+        
+        async def request(name, path, payload):
+            await exchange(port, [('POST', path, payload)])
+            order.append(name)
+            
+        slow = asyncio.ensure_future(request('generate', '/generate', {"count": 1}))
+        await asyncio.sleep(0.05)
+        await request('strength', '/strength', {"passwords": ["abc"]})
+        SlowService.answered.set()
+        await slow
+        return order
+        
+    async def run(tmp):
+        words = os.path.join(tmp, 'words.txt')
+        with open(words, 'w') as f:
+            f.write("\n".join(f"word{i}" for i in range(100)))
+        with open(os.path.join(tmp, 'secret.txt'), 'w') as f:
+            f.write("SECRET\n")
+        service = SlowService(os.path.join(tmp, 'vault.jsonl'), wordlist=words)
+        server = await password_server.start_server(service, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            assert await run_concurrent(port) == ['strength', 'generate']
+            for length in (b'abc', b'-5'):
+                assert await raw_status(port, b"POST /generate HTTP/1.1\r\n"
+                                        b"Content-Length: " + length + b"\r\n\r\n") == 400
+            # Requests a web page could send are refused
+            for headers, status in ((b"Host: evil.example:8765\r\n", 403),
+                                    (b"Host: localhost\r\nOrigin: http://evil.example\r\n", 403),
+                                    (b"Host: 127.0.0.1\r\nContent-Type: text/plain\r\n", 415)):
+                assert await raw_status(port, b"POST /vault HTTP/1.1\r\n" + headers +
+                                        b"Content-Length: 2\r\n\r\n{}") == status
+            return await exchange(port, [
+                ('POST', '/generate', {"length": 10, "count": 5, "symbols": False}),
+                ('POST', '/strength', {"passwords": ["abc123"]}),
+                ('POST', '/vault', {"entries": [{"password": "one", "description": "first"},
+                                                {"password": "two"}]}),
+                ('GET', '/vault?limit=1&offset=1', None),
+                ('POST', '/generate', {"count": -1}),
+                ('GET', '/missing', None),
+                ('POST', '/vault', {"password": ["a", "b"], "description": 5}),
+                ('POST', '/vault', {"entries": [{"password": "three", "description": 5}]}),
+                ('GET', '/vault?search=first', None),
+                ('POST', '/vault', {"entries": [{"password": "one"}, {"password": "three"},
+                                                {"password": "three"}]}),
+                ('POST', '/generate', {"words": 3, "wordlist": os.path.join(tmp, 'secret.txt')}),
+            ])
+            
+    with tempfile.TemporaryDirectory() as tmp:
+        responses = asyncio.run(run(tmp))
+        # Clients cannot make the server read (or index) a file of their choosing
+        assert not any(name.startswith('secret.txt.') for name in os.listdir(tmp))
+        
+    (s1, generated), (s2, strength), (s3, saved), (s4, listed), (s5, _), (s6, _) = responses[:6]
+    assert s1 == 200 and len(generated["passwords"]) == 5
+    assert all(p.isalnum() and len(p) == 10 for p in generated["passwords"])
+    assert s2 == 200 and strength["results"][0]["strength"] == "Weak"
+    assert s3 == 200 and saved == {"saved": 2, "duplicates": 0}
+    assert s4 == 200 and [e["password"] for e in listed["entries"]] == ["two"]
+    assert (s5, s6) == (400, 404)
+    # Entries that are not strings are rejected, so the vault stays searchable
+    (s7, _), (s8, _), (s9, searched), (s10, resaved) = responses[6:10]
+    assert (s7, s8, s9) == (400, 400, 200)
+    assert [e["password"] for e in searched["entries"]] == ["one"]
+    # Passwords the vault (or the same request) already has are skipped
+    assert s10 == 200 and resaved == {"saved": 1, "duplicates": 2}
+    s11, phrases = responses[10]
+    assert s11 == 200 and all(w.startswith("word") for w in phrases["passwords"][0].split("-"))
+    
+    # An encrypted vault is served with the master password given at startup
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'vault.jsonl')
+        service = password_server.PasswordService(path, master_password="correct horse")
+        assert service.save({"password": "secret-one"}) == {"saved": 1, "duplicates": 0}
+        assert [e["password"] for e in service.list({})["entries"]] == ["secret-one"]
+        reopened = password_server.PasswordService(path, master_password="correct horse")
+        assert [e["password"] for e in reopened.list({})["entries"]] == ["secret-one"]
+        service.close()
+        reopened.close()
+
+def test_stdin_requests():
+    """Test line-delimited JSON requests, in bulk and in lockstep through a pipe."""
+    import io
+    import json
+    import os
+    import subprocess
+    import tempfile
+    import password_server
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        service = password_server.PasswordService(os.path.join(tmp, 'vault.jsonl'))
+        requests = ('{"length": 12, "count": 3, "id": "a"}\n\n'
+                    '{"length": 10, "symbols": false, "policy": {"min_digits": 4}}\n'
+                    'not json\n{"count": 0}\n')
+        out = io.StringIO()
+        assert password_server.serve_lines(service, io.StringIO(requests), out) == 4
+        results = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert results[0]["id"] == "a" and len(results[0]["passwords"]) == 3
+        assert sum(c.isdigit() for c in results[1]["passwords"][0]) >= 4
+        assert "error" in results[2] and "error" in results[3]
+        
+        # Every size field is capped, not just count
+        for params in ({"length": 10 ** 9}, {"count": 100000, "length": 1000}, {"words": 10 ** 6},
+                       {"words": 3, "digits": 10 ** 6}, {"words": 3, "separator": "-" * 10 ** 6}):
+            try:
+                service.generate(params)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"{params} should be rejected")
+        
+        # A coprocess must answer each request before the next one is sent
+        script = os.path.join(os.path.dirname(os.path.abspath(password_server.__file__)),
+                              'cli_password_generator.py')
+        proc = subprocess.Popen([sys.executable, script, '--stdin'], cwd=tmp, text=True,
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        try:
+            for n in range(1, 4):
+                proc.stdin.write(json.dumps({"length": 8, "count": n}) + "\n")
+                proc.stdin.flush()
+                assert len(json.loads(proc.stdout.readline())["passwords"]) == n
+        finally:
+            proc.stdin.close()
+            assert proc.wait(timeout=10) == 0
+
+def test_random_pool():
+    """Test that the randomness pool never hands out the same bytes twice."""
+    import os
+    import threading
+    import password_engine
+    
+    pool = password_engine.RandomPool(size=1024)
+    views = [pool.take(100) for _ in range(50)]  # crosses several buffer swaps
+    assert all(isinstance(v, memoryview) and len(v) == 100 for v in views)
+    chunks = {v.tobytes() for v in views}
+    assert len(chunks) == 50
+    assert len(pool.take(4096)) == 4096  # larger than the pool goes straight to the OS
+    assert len(password_engine.random_bytes(10)) == 10
+    
+    # Reads from several threads at once never overlap
+    results = []
+    threads = [threading.Thread(target=lambda: results.extend(pool.read(16) for _ in range(2000)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(results)) == len(results) == 8000
+    
+    # A forked child must not reuse the parent's buffered bytes
+    if hasattr(os, 'fork'):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.write(write_fd, pool.read(16))
+            os._exit(0)
+        os.waitpid(pid, 0)
+        assert os.read(read_fd, 16) != pool.read(16)
+        os.close(read_fd)
+        os.close(write_fd)
+
+def test_benchmark_suite():
+    """Test a tiny benchmark run and the baseline regression check."""
+    import json
+    import os
+    import tempfile
+    import password_benchmark
+
+    results = password_benchmark.run_benchmarks(lengths=(8,), vault_sizes=(10,), min_time=0.001,
+                                                startup_runs=1)
+    assert len([name for name in results if name.startswith('generate/')]) == 60
+    assert "strength/check_password_strength" in results
+    assert "vault/jsonl/size=10/save_password" in results
+    assert "vault/db/size=10/load_saved_passwords" in results
+    assert "startup/cli_generate" in results
+    assert password_benchmark.compare(results, results) == []
+
+    # Halved throughput and doubled latency are both regressions
+    baseline = {name: dict(r, value=r["value"] * (2 if r["higher_is_better"] else 0.5))
+                for name, r in results.items()}
+    assert len(password_benchmark.compare(results, baseline)) == len(results)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.json")
+        with open(path, 'w') as f:
+            json.dump({"results": baseline}, f)
+        assert password_benchmark.main(['--quick', '--min-time', '0.001', '--baseline', path]) == 1
+
+def test_pattern_generation():
+    """Test template and pronounceable passwords and their exact entropy."""
+    import io
+    import json
+    import math
+    from contextlib import redirect_stdout
+    import cli_password_generator
+    import password_pattern
+    from password_core import PasswordCore
+    
+    passwords = password_pattern.generate_from_template('Cvcc-9999-\\9', 500)
+    assert len(passwords) == 500 and len(set(passwords)) == 500
+    for password in passwords:
+        assert password[0] in password_pattern.CONSONANTS.upper()
+        assert password[1] in password_pattern.VOWELS and password[2:4].islower()
+        assert password[4] == '-' and password[5:9].isdigit() and password[9:] == '-9'
+    expected = math.log2(21) * 3 + math.log2(5) + math.log2(10) * 4
+    assert abs(password_pattern.template_entropy('Cvcc-9999-\\9') - expected) < 1e-9
+    for bad in ('---', 'abc\\', 'Cvé'):
+        try:
+            password_pattern.compile_template(bad)
+            assert False, f"Template {bad!r} should be rejected"
+        except ValueError:
+            pass
+    
+    # Every state of the syllable table has the same number of successors
+    model = password_pattern.markov_model()
+    assert len(model.successors) == len(password_pattern.CODAS) * model.width
+    expected = math.log2(len(model.syllables)) + 2 * math.log2(model.width) + math.log2(100)
+    assert abs(password_pattern.pronounceable_entropy(3, digits=2) - expected) < 1e-9
+    
+    core = PasswordCore()
+    chunks = list(core.generate_pronounceable_chunks(2000, syllables=3, separator='.',
+                                                     capitalize=True, digits=2))
+    passwords = [p for chunk in chunks for p in chunk]
+    assert len(passwords) == 2000
+    for password in passwords:
+        syllables = password.split('.')
+        assert len(syllables) == 3 and password[0].isupper() and password[-2:].isdigit()
+        assert syllables[1] in model.syllables
+    
+    out = io.StringIO()
+    with redirect_stdout(out):
+        assert cli_password_generator.main(['--template', 'Aaaa#99', '--format', 'json',
+                                            '--with-entropy']) == 0
+    [result] = json.loads(out.getvalue())
+    assert len(result["password"]) == 7 and result["password"][0].isupper()
+    assert result["entropy"] == round(password_pattern.template_entropy('Aaaa#99'), 1)
+
 def test_gui_import():
     """Test if GUI module can be imported."""
     try: